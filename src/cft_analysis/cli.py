@@ -0,0 +1,100 @@
+"""Command line interface for the sharded ECG processing and feature computation pipeline.
+
+Examples
+--------
+Process ECG data and compute features in four shards (e.g., as four parallel jobs), then merge the results:
+
+.. code-block:: bash
+
+    cft-analysis process-ecg <base_path> --shard 0/4
+    cft-analysis compute-features <base_path> <output_path> --shard 0/4
+    ...
+    cft-analysis merge <output_path>
+
+"""
+import argparse
+from pathlib import Path
+from typing import Optional, Sequence
+
+from cft_analysis import pipeline
+
+__all__ = ["main"]
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Run the ``cft-analysis`` command line interface.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        command line arguments or ``None`` to use the arguments passed to the interpreter. Default: ``None``
+
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        parser.exit(1)
+
+    if args.command == "process-ecg":
+        shard_index, n_shards = args.shard
+        subjects = pipeline.process_ecg(args.base_path, shard_index, n_shards, overwrite=args.overwrite)
+        print("Processed ECG data of {} subject(s) in shard {}/{}.".format(len(subjects), shard_index, n_shards))
+    elif args.command == "compute-features":
+        shard_index, n_shards = args.shard
+        shard_path = pipeline.compute_features(args.base_path, args.output_path, shard_index, n_shards)
+        print("Exported features of shard {}/{} to '{}'.".format(shard_index, n_shards, shard_path))
+    elif args.command == "merge":
+        try:
+            export_paths = pipeline.merge_features(args.output_path)
+        except ValueError as e:
+            parser.exit(1, "Merging failed: {}\n".format(e))
+        for path in export_paths.values():
+            print("Exported '{}'.".format(path))
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cft-analysis", description="ECG processing and feature computation pipeline for the CFT dataset."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_ecg = subparsers.add_parser("process-ecg", help="Process raw ECG data of all subjects in a shard.")
+    parser_ecg.add_argument("base_path", type=Path, help="Base path to the CFT dataset.")
+    _add_shard_argument(parser_ecg)
+    parser_ecg.add_argument(
+        "--overwrite", action="store_true", help="Re-process subjects with already existing processing results."
+    )
+
+    parser_features = subparsers.add_parser(
+        "compute-features", help="Compute HR, HRV, and CFT features of all subjects in a shard."
+    )
+    parser_features.add_argument("base_path", type=Path, help="Base path to the CFT dataset.")
+    parser_features.add_argument("output_path", type=Path, help="Base path to export results to.")
+    _add_shard_argument(parser_features)
+
+    parser_merge = subparsers.add_parser("merge", help="Merge the results of all shards.")
+    parser_merge.add_argument("output_path", type=Path, help="Base path the results of all shards were exported to.")
+
+    return parser
+
+
+def _add_shard_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--shard",
+        type=_shard_type,
+        default=(0, 1),
+        metavar="i/N",
+        help="Only process the i-th (zero-based) of N shards of subjects. Default: 0/1 (all subjects).",
+    )
+
+
+def _shard_type(shard: str):
+    try:
+        return pipeline.parse_shard(shard)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+if __name__ == "__main__":
+    main()
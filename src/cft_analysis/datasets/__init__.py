@@ -1,6 +1,6 @@
 """Module including ``tpcp`` Dataset representations.
 
-This module provides two different representations of the dataset:
+This module provides three different representations of the dataset:
 
 * ``CftDatasetRaw``: Representation of raw ECG, saliva, and self-report data.
   The following data properties are available in the raw dataset:
@@ -29,10 +29,15 @@ This module provides two different representations of the dataset:
   * ``cortisol_features``: Features computed from cortisol samples to characterize the reaction to the MIST and
     possible group differences.
 
+* ``CftDatasetProcessedMultiStudy``: Representation of processed data from multiple studies, each with its own
+  base path, combined under an additional ``study`` index level. It provides the same data properties as
+  ``CftDatasetProcessed``, but loads data study by study.
+
 
 """
 
+from cft_analysis.datasets._cft_dataset_multi_study import CftDatasetProcessedMultiStudy
 from cft_analysis.datasets._cft_dataset_processed import CftDatasetProcessed
 from cft_analysis.datasets._cft_dataset_raw import CftDatasetRaw
 
-__all__ = ["CftDatasetRaw", "CftDatasetProcessed", "helper"]
+__all__ = ["CftDatasetRaw", "CftDatasetProcessed", "CftDatasetProcessedMultiStudy", "helper"]
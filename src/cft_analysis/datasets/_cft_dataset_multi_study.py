@@ -0,0 +1,214 @@
+"""Dataset federating processed data of the CFT dataset from multiple studies."""
+import warnings
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import pandas as pd
+from tpcp import Dataset
+
+from cft_analysis._types import path_t
+from cft_analysis.datasets._cft_dataset_processed import CftDatasetProcessed
+
+
+class CftDatasetProcessedMultiStudy(Dataset):
+    """Representation of processed data from multiple CFT studies, each with its own ``base_path``.
+
+    The data of all studies are combined under an additional ``study`` index level. Data are only loaded once the
+    respective attributes are accessed and are loaded study by study, i.e., only the selected part of one study's
+    data is held in memory at once. Use :meth:`iter_studies` or :meth:`iter_data` to stream over the studies instead
+    of loading the union of all studies.
+
+    Parameters
+    ----------
+    base_paths
+        Dictionary with study names as keys and the base folders where the dataset of each study can be found as
+        values. Each base folder is expected to have the same structure as for :class:`CftDatasetProcessed`.
+    exclude_subjects:
+        ``True`` to exclude selected participants from the dataset
+        (since they are outlier or there were problems during data collection), ``False`` to load and use data from
+        all participants. Excluded participants are specified per study.
+        Default: ``True``
+    skip_missing:
+        ``True`` to skip studies that do not contain the files required to load the requested data (with a warning),
+        ``False`` to raise an error instead.
+        Default: ``False``
+
+    """
+
+    base_paths: Dict[str, path_t]
+    exclude_subjects: bool
+    skip_missing: bool
+
+    def __init__(
+        self,
+        base_paths: Dict[str, path_t],
+        groupby_cols: Optional[Sequence[str]] = None,
+        subset_index: Optional[Sequence[str]] = None,
+        exclude_subjects: Optional[bool] = True,
+        skip_missing: Optional[bool] = False,
+    ):
+        self.base_paths = base_paths
+        self.exclude_subjects = exclude_subjects
+        self.skip_missing = skip_missing
+        super().__init__(groupby_cols=groupby_cols, subset_index=subset_index)
+
+    def create_index(self) -> pd.DataFrame:
+        index_dict = {
+            study: CftDatasetProcessed(base_path, exclude_subjects=self.exclude_subjects).index.drop_duplicates()
+            for study, base_path in self.base_paths.items()
+        }
+        index = pd.concat(index_dict, names=["study", None]).reset_index(level="study")
+        index = index.reset_index(drop=True)
+        return index
+
+    @property
+    def studies(self) -> Sequence[str]:
+        """Return the studies in the current subset."""
+        return list(self.index["study"].unique())
+
+    def iter_studies(self) -> Iterator[Tuple[str, CftDatasetProcessed]]:
+        """Iterate over the studies in the current subset.
+
+        Yields
+        ------
+        study : str
+            name of the study
+        dataset : :class:`~cft_analysis.datasets.CftDatasetProcessed`
+            dataset of this study, subset to the part of the index selected in this dataset
+
+        """
+        index = self.index
+        for study in self.studies:
+            study_index = index[index["study"] == study].drop(columns="study").reset_index(drop=True)
+            yield study, CftDatasetProcessed(
+                self.base_paths[study], subset_index=study_index, exclude_subjects=self.exclude_subjects
+            )
+
+    def iter_data(self, data_type: str) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Iterate over the studies in the current subset and load the selected data of one study at a time.
+
+        The data of each study are restricted to the part of the index selected in this dataset while loading.
+        If ``skip_missing`` is ``True``, studies that do not contain the files required for ``data_type`` are skipped
+        with a warning.
+
+        Parameters
+        ----------
+        data_type : str
+            name of the data attribute of :class:`~cft_analysis.datasets.CftDatasetProcessed` to load,
+            e.g., "heart_rate" or "cortisol"
+
+        Yields
+        ------
+        study : str
+            name of the study
+        data : :class:`~pandas.DataFrame`
+            selected data of this study
+
+        Raises
+        ------
+        ValueError
+            if ``data_type`` is not a data attribute of :class:`~cft_analysis.datasets.CftDatasetProcessed`
+        FileNotFoundError
+            if a study does not contain the files required for ``data_type`` and ``skip_missing`` is ``False``
+
+        """
+        for study, dataset in self.iter_studies():
+            missing_files = [path for path in dataset.get_data_files(data_type) if not path.exists()]
+            if len(missing_files) > 0:
+                msg = "Study '{}' does not contain {} data (missing file(s): {})".format(
+                    study, data_type, ", ".join(str(path) for path in missing_files)
+                )
+                if not self.skip_missing:
+                    raise FileNotFoundError("{}!".format(msg))
+                warnings.warn("{}. Skipping study...".format(msg))
+                continue
+            yield study, getattr(dataset, data_type)
+
+    @property
+    def condition_list(self) -> pd.DataFrame:
+        """Return condition list.
+
+        Returns
+        -------
+        dataframe
+            dataframe with mapping of study, subject ID and condition
+
+        """
+        condition_list = self.index[["study", "subject", "condition"]]
+        condition_list = condition_list.drop_duplicates().set_index(["study", "subject"]).sort_index()
+        return condition_list
+
+    @property
+    def heart_rate(self) -> pd.DataFrame:
+        """Load and return heart rate data of all studies.
+
+        See Also
+        --------
+        :attr:`~cft_analysis.datasets.CftDatasetProcessed.heart_rate`
+
+        """
+        return self._concat_studies("heart_rate")
+
+    @property
+    def heart_rate_ensemble(self) -> pd.DataFrame:
+        """Load and return ensemble heart rate of all studies.
+
+        The participants of each study are combined into columns with an additional ``study`` level.
+
+        See Also
+        --------
+        :attr:`~cft_analysis.datasets.CftDatasetProcessed.heart_rate_ensemble`
+
+        """
+        return self._concat_studies("heart_rate_ensemble", axis=1)
+
+    @property
+    def hrv(self) -> pd.DataFrame:
+        """Load and return heart rate variability data of all studies."""
+        return self._concat_studies("hrv")
+
+    @property
+    def hr_hrv(self) -> pd.DataFrame:
+        """Load and return combined heart rate and heart rate variability data of all studies."""
+        return self._concat_studies("hr_hrv")
+
+    @property
+    def time_above_baseline(self) -> pd.DataFrame:
+        """Load and return the relative time of heart rate above a specified baseline of all studies."""
+        return self._concat_studies("time_above_baseline")
+
+    @property
+    def cft_parameter(self) -> pd.DataFrame:
+        """Load and return CFT parameter characterizing the physiological reaction to each CFT of all studies."""
+        return self._concat_studies("cft_parameter")
+
+    @property
+    def questionnaire(self) -> pd.DataFrame:
+        """Load and return questionnaire data of all studies."""
+        return self._concat_studies("questionnaire")
+
+    @property
+    def questionnaire_recoded(self) -> pd.DataFrame:
+        """Load and return questionnaire data of all studies recoded from numerical to categorical data."""
+        return self._concat_studies("questionnaire_recoded")
+
+    @property
+    def sample_times(self) -> Sequence[int]:
+        """Return saliva sampling times."""
+        return CftDatasetProcessed._saliva_sample_times
+
+    @property
+    def cortisol(self) -> pd.DataFrame:
+        """Load and return cortisol data of all studies."""
+        return self._concat_studies("cortisol")
+
+    @property
+    def cortisol_features(self) -> pd.DataFrame:
+        """Load and return features computed from cortisol data of all studies."""
+        return self._concat_studies("cortisol_features")
+
+    def _concat_studies(self, data_type: str, axis: Optional[int] = 0) -> pd.DataFrame:
+        # data are already restricted to the current subset of each study before being concatenated
+        data_dict = dict(self.iter_data(data_type))
+        if len(data_dict) == 0:
+            raise ValueError("None of the selected studies contains {} data!".format(data_type))
+        return pd.concat(data_dict, names=["study"], axis=axis)
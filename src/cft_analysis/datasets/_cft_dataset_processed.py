@@ -1,20 +1,32 @@
 """Dataset representing processed data of the CFT dataset."""
 import warnings
-from typing import Optional, Sequence, Union
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
 
-import biopsykit as bp
 import pandas as pd
-from biopsykit.io import load_long_format_csv, load_questionnaire_data
+from biopsykit.io import load_long_format_csv
 from biopsykit.utils.dataframe_handling import multi_xs
 from tpcp import Dataset
 
 from cft_analysis._types import path_t
+from cft_analysis.datasets.helper import (
+    apply_codebook_compiled,
+    load_codebook_compiled,
+    load_dataset_index_cached,
+    load_hr_ensemble,
+    load_long_format_csv_partitioned,
+    load_questionnaire_data_cached,
+)
+from cft_analysis.feature_extraction.saliva import saliva_window_features
 
 
 class CftDatasetProcessed(Dataset):
     """Representation of processed data (heart rate (variability), saliva, self-reports) from the CFT study.
 
-    Data are only loaded once the respective attributes are accessed.
+    Data are only loaded once the respective attributes are accessed. The dataset index (i.e., the unique
+    condition/subject/phase/subphase combinations) and the list of excluded subjects are persisted in a sidecar file
+    next to the HR feature file (see :func:`~cft_analysis.datasets.helper.load_dataset_index_cached`), so creating
+    a dataset does not require parsing the HR feature file.
 
     Parameters
     ----------
@@ -31,8 +43,31 @@ class CftDatasetProcessed(Dataset):
     EXCLUDED_SUBJECTS: Sequence[str]  # pylint:disable=invalid-name
     base_path: path_t
     cft_hr_features_filename: str = "ecg/cft_hr_features_merged.csv"
+    cft_hr_features_chunksize: int = 100000
+    cft_hr_ensemble_filename: str = "ecg/cft_hr_ensemble.npy"
+    excluded_subjects_filename: str = "excluded_subjects.csv"
+    questionnaire_filename: str = "questionnaire/questionnaire_data.csv"
+    codebook_filename: str = "questionnaire/codebook.csv"
+    saliva_samples_filename: str = "saliva/{}_samples.csv"
+    saliva_features_filename: str = "saliva/{}_features.csv"
     exclude_subjects: bool
     _saliva_sample_times: Sequence[int] = [-30, -1, 0, 10, 20, 30, 40]
+    # sampling times the saliva features in "saliva/{}_features.csv" were computed with (see Saliva_Processing.ipynb)
+    _saliva_feature_sample_times: Sequence[int] = [-30, -1, 30, 40, 50, 60, 70]
+    # filename attributes of the files required to load each data attribute. Saliva filenames are formatted with the
+    # saliva type, i.e., the first part of the data attribute name (e.g., "cortisol" for "cortisol_features")
+    _data_filename_attributes: Dict[str, Sequence[str]] = {
+        "heart_rate": ["cft_hr_features_filename"],
+        "heart_rate_ensemble": ["cft_hr_ensemble_filename"],
+        "hrv": ["cft_hr_features_filename"],
+        "hr_hrv": ["cft_hr_features_filename"],
+        "time_above_baseline": ["cft_hr_features_filename"],
+        "cft_parameter": ["cft_hr_features_filename"],
+        "questionnaire": ["questionnaire_filename"],
+        "questionnaire_recoded": ["questionnaire_filename", "codebook_filename"],
+        "cortisol": ["saliva_samples_filename"],
+        "cortisol_features": ["saliva_features_filename"],
+    }
 
     def __init__(
         self,
@@ -49,19 +84,26 @@ class CftDatasetProcessed(Dataset):
 
     def _exclude_subjects(self):
         if self.exclude_subjects:
-            file_path = self.base_path.joinpath("excluded_subjects.csv")
-            if not file_path.exists():
+            if not self.base_path.joinpath(self.excluded_subjects_filename).exists():
                 warnings.warn("File containing subject IDs to be excluded not found. Loading data of all subjects...")
-            excluded_subjects = pd.read_csv(file_path).sort_values(by="subject")
-            self.EXCLUDED_SUBJECTS = list(excluded_subjects["subject"])  # pylint:disable=invalid-name
+            _, excluded_subjects = self._load_index()
+            self.EXCLUDED_SUBJECTS = excluded_subjects  # pylint:disable=invalid-name
+
+    def _load_index(self) -> Tuple[pd.DataFrame, Sequence[str]]:
+        file_path = self.base_path.joinpath(self.excluded_subjects_filename)
+        if not file_path.exists():
+            file_path = None
+        # unique index tuples and excluded subjects are persisted in a sidecar file and shared between all instances
+        return load_dataset_index_cached(
+            self.base_path.joinpath(self.cft_hr_features_filename),
+            index_cols=["condition", "subject", "phase", "subphase"],
+            excluded_subjects_path=file_path,
+        )
 
     def create_index(self) -> pd.DataFrame:
-        cft_hr_features = pd.read_csv(self.base_path.joinpath(self.cft_hr_features_filename))
-        index_cols = ["condition", "subject", "phase", "subphase"]
-        index = cft_hr_features[index_cols].set_index(index_cols)
+        index, excluded_subjects = self._load_index()
         if self.exclude_subjects:
-            index = index.drop(self.EXCLUDED_SUBJECTS, level="subject")
-        index = index.reset_index()
+            index = index.loc[~index["subject"].isin(excluded_subjects)].reset_index(drop=True)
         return index
 
     @property
@@ -99,18 +141,17 @@ class CftDatasetProcessed(Dataset):
 
         This function returns *ensemble heart rate* data, i.e., time-series data where the data of each participant
         has equal length, allowing to merge it into one dataframe and visualize is in a *ensemble plot*.
+        Ensemble data are computed by :func:`~cft_analysis.feature_extraction.hr_ensemble.compute_hr_ensemble` and
+        only the selected phases and participants are loaded from file.
 
         """
         if self.is_single(None) or self.is_single("subphase"):
             raise ValueError("hr_ensemble data can not be accessed for individual subphases!")
-        ensemble_dict = bp.io.load_pandas_dict_excel(self.base_path.joinpath("ecg/cft_hr_ensemble.xlsx"))
         phases = self.index["phase"].unique()
         subjects = self.index["subject"].unique()
-        ensemble_dict = {key: ensemble_dict[key] for key in phases if key in ensemble_dict.keys()}
-        ensemble_dict = {key: val[subjects] for key, val in ensemble_dict.items()}
-        data = pd.concat(ensemble_dict, names=["phase"])
-        data.columns.name = "subject"
-        return data
+        return load_hr_ensemble(
+            self.base_path.joinpath(self.cft_hr_ensemble_filename), phases=phases, subjects=subjects
+        )
 
     @property
     def hrv(self) -> pd.DataFrame:
@@ -134,15 +175,20 @@ class CftDatasetProcessed(Dataset):
 
     @property
     def questionnaire(self):
-        """Load and return questionnaire data."""
+        """Load and return questionnaire data.
+
+        Questionnaire data are loaded from file only once and then shared between all datasets with the same
+        ``base_path``.
+
+        """
         return self._load_questionnaire_data()
 
     @property
     def questionnaire_recoded(self):
         """Load and return questionnaire data recoded from numerical to categorical data using the codebook."""
         data = self._load_questionnaire_data()
-        codebook = bp.io.load_codebook(self.base_path.joinpath("questionnaire/codebook.csv"))
-        return bp.utils.dataframe_handling.apply_codebook(data, codebook)
+        codebook = load_codebook_compiled(self.base_path.joinpath(self.codebook_filename))
+        return apply_codebook_compiled(data, codebook)
 
     @property
     def sample_times(self) -> Sequence[int]:
@@ -159,8 +205,90 @@ class CftDatasetProcessed(Dataset):
         """Load and return features computed from cortisol data."""
         return self._load_saliva_feature_data("cortisol")
 
-    def _load_cft_hr_features(self) -> pd.DataFrame:
-        return load_long_format_csv(self.base_path.joinpath(self.cft_hr_features_filename))
+    def get_data_files(self, data_type: str) -> Sequence[Path]:
+        """Return the paths of the files required to load a data attribute.
+
+        Parameters
+        ----------
+        data_type : str
+            name of the data attribute, e.g., "heart_rate" or "cortisol"
+
+        Returns
+        -------
+        list of :class:`~pathlib.Path`
+            paths of the files required to load ``data_type``
+
+        Raises
+        ------
+        ValueError
+            if ``data_type`` is not a data attribute of the dataset
+
+        """
+        if data_type not in self._data_filename_attributes:
+            raise ValueError(
+                "Invalid 'data_type'! Expected one of {}, got '{}'.".format(
+                    list(self._data_filename_attributes), data_type
+                )
+            )
+        saliva_type = data_type.split("_")[0]
+        return [
+            Path(self.base_path).joinpath(getattr(self, attribute).format(saliva_type))
+            for attribute in self._data_filename_attributes[data_type]
+        ]
+
+    def compute_saliva_features(
+        self,
+        saliva_type: Optional[str] = "cortisol",
+        windows: Optional[Union[Dict[str, Tuple[str, str]], Sequence[Tuple[str, str]]]] = None,
+        sample_times: Optional[Sequence[float]] = None,
+    ) -> pd.DataFrame:
+        """Compute saliva features for (multiple) windows of saliva samples from the raw saliva samples.
+
+        In contrast to :attr:`cortisol_features`, which loads precomputed features, the features are computed from
+        the saliva samples of all selected participants at once using
+        :func:`~cft_analysis.feature_extraction.saliva.saliva_window_features`. This allows to efficiently compute
+        features for alternative sample windows.
+
+        By default, the features are computed with the same saliva sampling times as the precomputed features in
+        :attr:`cortisol_features` (see the saliva processing notebook), i.e., [-30, -1, 30, 40, 50, 60, 70] min for
+        the samples S0 to S6. Note that these differ from :attr:`sample_times`. With these sampling times, the
+        features of the windows "S1S6" (``auc_g``, ``auc_i``, ``max_inc``, ``max_inc_percent``), "S2S6" (``auc_i``,
+        i.e., ``auc_i_post``), and "S1S4" (``slope``) are identical to :attr:`cortisol_features`.
+
+        Parameters
+        ----------
+        saliva_type : str, optional
+            saliva type to compute features on. Default: "cortisol"
+        windows : dict or list of tuple, optional
+            windows to compute features for, defined by their first and last sample label, or ``None`` to compute
+            features for all possible windows. Default: ``None``
+        sample_times : list of float, optional
+            saliva sampling times (in minutes) or ``None`` to use the sampling times of the precomputed saliva
+            features (see above). Default: ``None``
+
+        Returns
+        -------
+        dataframe
+            saliva features per participant and window in long-format
+
+        """
+        data = self._load_saliva_data(saliva_type)
+        if sample_times is None:
+            sample_times = self._saliva_feature_sample_times
+        return saliva_window_features(data, sample_times, windows=windows, saliva_type=saliva_type)
+
+    def _load_cft_hr_features(self, category: Optional[Union[str, Sequence[str]]] = None) -> pd.DataFrame:
+        if category is None:
+            return load_long_format_csv(self.base_path.joinpath(self.cft_hr_features_filename))
+        if isinstance(category, str):
+            category = [category]
+        # only load the requested categories of the selected subjects partition-wise
+        filter_dict = {"category": category, "subject": self.index["subject"].unique()}
+        return load_long_format_csv_partitioned(
+            self.base_path.joinpath(self.cft_hr_features_filename),
+            filter_dict=filter_dict,
+            chunksize=self.cft_hr_features_chunksize,
+        )
 
     def _get_index(self) -> pd.DataFrame:
         index = self.index.drop_duplicates()
@@ -168,25 +296,21 @@ class CftDatasetProcessed(Dataset):
         return index
 
     def _slice_hr_data(self, category: Union[str, Sequence[str]]) -> pd.DataFrame:
-        data = self._load_cft_hr_features()
+        data = self._load_cft_hr_features(category)
         data = multi_xs(data, category, level="category")
         index = self._get_index()
         return index.join(data).dropna()
 
     def _load_questionnaire_data(self) -> pd.DataFrame:
         self._assert_is_single_helper("questionnaire")
-        data_path = self.base_path.joinpath("questionnaire/questionnaire_data.csv")
-
-        data = load_questionnaire_data(data_path)
-        subject_ids = self.index["subject"].unique()
-        data = data.loc[subject_ids]
-
-        condition = self.index["condition"].unique()
-        return multi_xs(data, condition, level="condition")
+        data = load_questionnaire_data_cached(self.base_path.joinpath(self.questionnaire_filename))
+        # select the subject/condition combinations of the current subset by index lookup on the cached data
+        subject_condition = pd.MultiIndex.from_frame(self.index[data.index.names].drop_duplicates())
+        return data.loc[data.index.isin(subject_condition)]
 
     def _load_saliva_data(self, saliva_type: str) -> pd.DataFrame:
         self._assert_is_single_helper(saliva_type)
-        data_path = self.base_path.joinpath(f"saliva/{saliva_type}_samples.csv")
+        data_path = self.base_path.joinpath(self.saliva_samples_filename.format(saliva_type))
         data = load_long_format_csv(data_path)
         subject_ids = self.index["subject"].unique()
         conditions = self.index["condition"].unique()
@@ -194,7 +318,7 @@ class CftDatasetProcessed(Dataset):
 
     def _load_saliva_feature_data(self, saliva_type: str) -> pd.DataFrame:
         self._assert_is_single_helper(saliva_type)
-        data_path = self.base_path.joinpath(f"saliva/{saliva_type}_features.csv")
+        data_path = self.base_path.joinpath(self.saliva_features_filename.format(saliva_type))
         data = load_long_format_csv(data_path)
         subject_ids = self.index["subject"].unique()
         conditions = self.index["condition"].unique()
@@ -5,14 +5,14 @@ from typing import Dict, Optional, Sequence, Tuple, Union
 
 import biopsykit as bp
 import pandas as pd
-from biopsykit.io import load_long_format_csv, load_questionnaire_data
+from biopsykit.io import load_long_format_csv
 from biopsykit.utils.dataframe_handling import multi_xs
 from biopsykit.utils.datatype_helper import SubjectConditionDataFrame
 from biopsykit.utils.file_handling import mkdirs
 from tpcp import Dataset
 
 from cft_analysis._types import path_t
-from cft_analysis.datasets.helper import load_ecg_raw_data_folder
+from cft_analysis.datasets.helper import load_ecg_raw_data_folder, load_questionnaire_data_cached
 
 _cached_load_ecg_raw_data_folder = lru_cache(maxsize=5)(load_ecg_raw_data_folder)
 
@@ -99,7 +99,7 @@ class CftDatasetRaw(Dataset):
             data_dict = _cached_load_ecg_raw_data_folder(
                 self.base_path,
                 subject_id,
-                phase_names=tuple(self.phases),
+                phases=tuple(self.phases),
                 selected_phases=tuple(phase),
                 datastreams="ecg",
             )
@@ -113,7 +113,12 @@ class CftDatasetRaw(Dataset):
 
     @property
     def questionnaire(self):
-        """Load and return questionnaire data."""
+        """Load and return questionnaire data.
+
+        Questionnaire data are loaded from file only once and then shared between all datasets with the same
+        ``base_path``.
+
+        """
         if self.is_single(None):
             raise ValueError("questionnaire data can not be accessed for individual phases!")
         return self._load_questionnaire_data()
@@ -139,12 +144,10 @@ class CftDatasetRaw(Dataset):
     def _load_questionnaire_data(self) -> pd.DataFrame:
         data_path = self.base_path.joinpath("questionnaire/cleaned/questionnaire_data_cleaned.xlsx")
 
-        data = load_questionnaire_data(data_path)
-        subject_ids = self.index["subject"].unique()
-        data = data.loc[subject_ids]
-
-        condition = self.index["condition"].unique()
-        return multi_xs(data, condition, level="condition")
+        data = load_questionnaire_data_cached(data_path)
+        # select the subject/condition combinations of the current subset by index lookup on the cached data
+        subject_condition = pd.MultiIndex.from_frame(self.index[data.index.names].drop_duplicates())
+        return data.loc[data.index.isin(subject_condition)]
 
     def _load_saliva_data(self, saliva_type: str) -> pd.DataFrame:
         if self.is_single(["subject", "condition", "phase"]):
@@ -1,19 +1,45 @@
 """Helper functions for loading data."""
+import datetime
+import json
+import os
+import re
 import warnings
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from biopsykit.io import load_pandas_dict_excel
+from biopsykit.io import load_codebook, load_pandas_dict_excel, load_questionnaire_data
 from biopsykit.io.nilspod import load_csv_nilspod, load_dataset_nilspod
 from biopsykit.utils._types import str_t
 from biopsykit.utils.datatype_helper import SubjectDataDict
-from nilspodlib.legacy import CorruptedPackageWarning, LegacyWarning
+from biopsykit.utils.time import tz
+from nilspodlib.consts import SENSOR_LEGENDS, SENSOR_SAMPLE_LENGTH
+from nilspodlib.header import Header
+from nilspodlib.legacy import CorruptedPackageWarning, LegacyWarning, find_conversion_function
+from nilspodlib.utils import get_header_and_data_bytes, get_strict_version_from_header_bytes, read_binary_uint8
+from packaging.version import Version
 from tqdm.auto import tqdm
 
 from cft_analysis._types import path_t
 
-__all__ = ["load_ecg_raw_data_folder", "load_subject_data_dicts"]
+__all__ = [
+    "apply_codebook_compiled",
+    "compile_codebook",
+    "load_codebook_compiled",
+    "load_dataset_index_cached",
+    "load_ecg_raw_data_folder",
+    "load_hr_ensemble",
+    "load_long_format_csv_partitioned",
+    "load_nilspod_bin_fast",
+    "load_nilspod_csv_fast",
+    "load_questionnaire_data_cached",
+    "load_subject_data_dicts",
+]
+
+# datastreams that nilspodlib calibrates when loading a dataset and that are therefore not supported by the fast path
+_NILSPOD_CALIBRATED_DATASTREAMS = ("acc", "gyro", "baro", "temperature")
 
 
 def load_ecg_raw_data_folder(
@@ -22,6 +48,7 @@ def load_ecg_raw_data_folder(
     phases: Sequence[str],
     selected_phases: Optional[str_t] = None,
     datastreams: Optional[Union[str, Sequence[str]]] = None,
+    fast_path: Optional[bool] = True,
 ) -> Dict[str, pd.DataFrame]:
     """Load all NilsPod datasets from one folder, convert them into dataframes, and combine them into a dictionary.
 
@@ -47,6 +74,11 @@ def load_ecg_raw_data_folder(
         list of datastreams if only specific datastreams of the dataset object should be imported or
         ``None`` to load all datastreams. Datastreams that are not part of the current dataset will be silently ignored.
         Default: ``None``
+    fast_path : bool, optional
+        ``True`` to decode the selected ``datastreams`` directly from the files using
+        :func:`~cft_analysis.datasets.helper.load_nilspod_bin_fast` and
+        :func:`~cft_analysis.datasets.helper.load_nilspod_csv_fast` instead of creating full ``nilspodlib`` Dataset
+        objects, ``False`` otherwise. Only used if ``datastreams`` is not ``None``. Default: ``True``
 
     Returns
     -------
@@ -75,7 +107,464 @@ def load_ecg_raw_data_folder(
     # cutting away the last second of the data
     warnings.filterwarnings("ignore", category=CorruptedPackageWarning)
     warnings.filterwarnings("ignore", category=LegacyWarning)
-    dataset_list = [
+    if fast_path and datastreams is not None:
+        dataset_list = [
+            load_nilspod_bin_fast(file_path=dataset_path, datastreams=datastreams)
+            if dataset_path.suffix == ".bin"
+            else load_nilspod_csv_fast(file_path=dataset_path, datastreams=datastreams)
+            for dataset_path in dataset_list
+        ]
+    else:
+        dataset_list = _load_nilspod_files(dataset_list, datastreams)
+    # remove the last second of the dataframe
+    dataset_list = [(data.iloc[: -int(fs)], fs) for (data, fs) in dataset_list]
+    dataset_dict = {phase: df for phase, (df, fs) in zip(phases, dataset_list)}
+
+    if selected_phases is not None:
+        dataset_dict = {phase: dataset_dict[phase] for phase in selected_phases}
+
+    return dataset_dict
+
+
+def load_long_format_csv_partitioned(
+    file_path: path_t,
+    filter_dict: Optional[Dict[str, Sequence[str]]] = None,
+    chunksize: Optional[int] = 100000,
+) -> pd.DataFrame:
+    """Load a long-format csv file partition-wise and only keep rows matching the given filter.
+
+    In contrast to :func:`biopsykit.io.load_long_format_csv`, the file is not loaded into memory at once, but is read
+    in chunks of ``chunksize`` rows. Each chunk is filtered before being concatenated, so only the selected part of the
+    file is ever held in memory completely.
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to long-format csv file. All columns except the last one are used as index.
+    filter_dict : dict, optional
+        dictionary with column names as keys and the values to keep as values or ``None`` to keep all rows.
+        Default: ``None``
+    chunksize : int, optional
+        number of rows to read at once. Default: 100000
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        dataframe in long-format with the filtered rows
+
+    """
+    filter_dict = filter_dict or {}
+    index_cols = list(pd.read_csv(file_path, nrows=0).columns)[:-1]
+
+    chunks = []
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        if filter_dict:
+            mask = np.logical_and.reduce([chunk[col].isin(values).to_numpy() for col, values in filter_dict.items()])
+            chunk = chunk.loc[mask]
+        chunks.append(chunk)
+    return pd.concat(chunks, ignore_index=True).set_index(index_cols)
+
+
+def load_questionnaire_data_cached(file_path: path_t) -> pd.DataFrame:
+    """Load questionnaire data from file and cache it for subsequent calls.
+
+    Questionnaire data is loaded using :func:`biopsykit.io.load_questionnaire_data` only once per file (and file
+    modification time), so all datasets (and subsets of datasets) with the same ``base_path`` share the same data.
+
+    .. note:: The returned dataframe is shared between all callers and must therefore not be modified in-place.
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to questionnaire data file. Must either be an Excel or csv file
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        dataframe with questionnaire data
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path).resolve()
+    return _cached_load_questionnaire_data(file_path, file_path.stat().st_mtime_ns)
+
+
+def compile_codebook(codebook: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Compile a codebook into lookup tables.
+
+    For each variable, the codebook is converted into a lookup table mapping numerical values to label codes and an
+    array with the labels of the variable. Several numerical values may map to the same label. This allows to recode
+    data with :func:`~cft_analysis.datasets.helper.apply_codebook_compiled` without iterating over the values of the
+    codebook.
+
+    Parameters
+    ----------
+    codebook : :obj:`~biopsykit.utils.datatype_helper.CodebookDataFrame`
+        codebook as returned by :func:`biopsykit.io.load_codebook`
+
+    Returns
+    -------
+    dict
+        dictionary with variable names as keys and tuples of lookup table and label array as values
+
+    Raises
+    ------
+    ValueError
+        if the codebook contains negative numerical values
+
+    """
+    codebook_compiled = {}
+    for variable, mapping in codebook.iterrows():
+        mapping = mapping.dropna()
+        values = mapping.index.to_numpy(dtype=int)
+        if np.any(values < 0):
+            raise ValueError(
+                "Codebook of variable '{}' contains negative values, which are not supported!".format(variable)
+            )
+        lookup = np.full(values.max() + 1, -1, dtype=int)
+        lookup[values] = np.arange(len(values))
+        codebook_compiled[variable] = (lookup, mapping.to_numpy(dtype=object))
+    return codebook_compiled
+
+
+def load_codebook_compiled(file_path: path_t) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Load a codebook from file and compile it into lookup tables.
+
+    The compiled codebook is cached for subsequent calls with the same file (and file modification time).
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to codebook file
+
+    Returns
+    -------
+    dict
+        compiled codebook as returned by :func:`~cft_analysis.datasets.helper.compile_codebook`
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path).resolve()
+    return _cached_load_codebook_compiled(file_path, file_path.stat().st_mtime_ns)
+
+
+def apply_codebook_compiled(
+    data: pd.DataFrame, codebook_compiled: Dict[str, Tuple[np.ndarray, np.ndarray]]
+) -> pd.DataFrame:
+    """Apply a compiled codebook to convert numerical to categorical values.
+
+    This is a vectorized alternative to :func:`biopsykit.utils.dataframe_handling.apply_codebook`: The values of each
+    column are mapped to their labels with the lookup table of the compiled codebook and, like with
+    ``apply_codebook``, the recoded columns contain the labels as plain (object) values.
+
+    .. note:: In contrast to ``apply_codebook``, values that are not part of the codebook (e.g., values out of the
+              range of the codebook) are set to NaN instead of being kept as numerical values.
+
+    Parameters
+    ----------
+    data : :class:`~pandas.DataFrame`
+        data to apply codebook on
+    codebook_compiled : dict
+        compiled codebook as returned by :func:`~cft_analysis.datasets.helper.compile_codebook`
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        copy of data with numerical values converted to categorical values
+
+    """
+    data = data.copy()
+    for level in data.index.names:
+        if level in codebook_compiled:
+            lookup, labels = codebook_compiled[level]
+            mapping = {value: labels[lookup[value]] for value in np.where(lookup >= 0)[0]}
+            data = data.rename(index=mapping, level=level)
+
+    for col in data.columns.intersection(list(codebook_compiled)):
+        lookup, labels = codebook_compiled[col]
+        values = data[col].to_numpy(dtype=float)
+        # NaN values and values that are not part of the codebook are mapped to code -1 (i.e., NaN)
+        mask_valid = np.isin(values, np.arange(len(lookup)))
+        codes = np.full(len(values), -1, dtype=int)
+        codes[mask_valid] = lookup[values[mask_valid].astype(int)]
+        data[col] = np.append(labels, np.nan)[codes]
+    return data
+
+
+def load_dataset_index_cached(
+    file_path: path_t, index_cols: Sequence[str], excluded_subjects_path: Optional[path_t] = None
+) -> Tuple[pd.DataFrame, Sequence[str]]:
+    """Load the unique index tuples of a long-format csv file and the list of excluded subjects.
+
+    Since parsing the complete file only to extract the index is slow for large files, the unique index tuples and the
+    list of excluded subjects are persisted in a sidecar file next to ``file_path`` (with the suffix ``.index.json``).
+    The sidecar is stamped with the modification times of both source files and is only rebuilt if one of them
+    changed. Additionally, the content of the sidecar is cached in memory, so all datasets (and subsets of datasets)
+    with the same ``base_path`` share the same index.
+
+    If the sidecar can not be written (e.g., because the dataset folder is read-only), the index is only cached in
+    memory.
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to long-format csv file
+    index_cols : list of str
+        names of the columns forming the index
+    excluded_subjects_path : :class:`~pathlib.Path` or str, optional
+        path to csv file with a ``subject`` column containing the IDs of subjects to exclude or ``None`` if no
+        subjects are excluded. Default: ``None``
+
+    Returns
+    -------
+    index : :class:`~pandas.DataFrame`
+        dataframe with the unique index tuples of the file, in the order of their first occurrence
+    excluded_subjects : list of str
+        sorted list of excluded subject IDs
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path).resolve()
+    stamp = _file_stamp(file_path)
+    excluded_stamp = None
+    if excluded_subjects_path is not None:
+        # ensure pathlib
+        excluded_subjects_path = Path(excluded_subjects_path).resolve()
+        excluded_stamp = _file_stamp(excluded_subjects_path)
+    index, excluded_subjects = _cached_load_dataset_index(
+        file_path, stamp, tuple(index_cols), excluded_subjects_path, excluded_stamp
+    )
+    # the cached index is shared between all callers, so return a copy
+    return index.copy(), list(excluded_subjects)
+
+
+@lru_cache(maxsize=8)
+def _cached_load_questionnaire_data(file_path: Path, mtime: int) -> pd.DataFrame:  # pylint:disable=unused-argument
+    return load_questionnaire_data(file_path)
+
+
+@lru_cache(maxsize=8)
+def _cached_load_codebook_compiled(  # pylint:disable=unused-argument
+    file_path: Path, mtime: int
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    return compile_codebook(load_codebook(file_path))
+
+
+@lru_cache(maxsize=8)
+def _cached_load_dataset_index(
+    file_path: Path,
+    stamp: Tuple[int, int],
+    index_cols: Tuple[str, ...],
+    excluded_subjects_path: Optional[Path],
+    excluded_stamp: Optional[Tuple[int, int]],
+) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    sidecar_path = file_path.with_suffix(".index.json")
+    sidecar = _read_index_sidecar(sidecar_path)
+    sidecar_changed = False
+
+    if sidecar.get("source_stamp") != list(stamp) or sidecar.get("index_cols") != list(index_cols):
+        index = pd.read_csv(file_path, usecols=list(index_cols))[list(index_cols)].drop_duplicates()
+        sidecar.update(source_stamp=list(stamp), index_cols=list(index_cols), index=index.to_numpy().tolist())
+        sidecar_changed = True
+
+    excluded_subjects_stamp = None
+    if excluded_subjects_path is not None:
+        excluded_subjects_stamp = [str(excluded_subjects_path), list(excluded_stamp)]
+    if "excluded_subjects" not in sidecar or sidecar.get("excluded_subjects_stamp") != excluded_subjects_stamp:
+        excluded_subjects = []
+        if excluded_subjects_path is not None:
+            excluded_subjects = sorted(pd.read_csv(excluded_subjects_path)["subject"])
+        sidecar.update(excluded_subjects_stamp=excluded_subjects_stamp, excluded_subjects=excluded_subjects)
+        sidecar_changed = True
+
+    if sidecar_changed:
+        _write_index_sidecar(sidecar_path, sidecar)
+    index = pd.DataFrame(sidecar["index"], columns=list(index_cols))
+    return index, tuple(sidecar["excluded_subjects"])
+
+
+def _file_stamp(file_path: Path) -> Tuple[int, int]:
+    stat = file_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_index_sidecar(sidecar_path: Path) -> Dict:
+    try:
+        with open(sidecar_path, encoding="utf-8") as fp:
+            sidecar = json.load(fp)
+    except (OSError, ValueError):
+        return {}
+    return sidecar if isinstance(sidecar, dict) else {}
+
+
+def _write_index_sidecar(sidecar_path: Path, sidecar: Dict):
+    # write to a temporary file first and replace the sidecar atomically, so that concurrent processes never read a
+    # partially written sidecar
+    tmp_path = sidecar_path.with_suffix(".{}.tmp".format(os.getpid()))
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(sidecar, fp)
+        os.replace(tmp_path, sidecar_path)
+    except OSError:
+        # e.g., read-only dataset folder => the index is only cached in memory
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_nilspod_bin_fast(
+    file_path: path_t,
+    datastreams: Optional[Union[str, Sequence[str]]] = "ecg",
+    timezone: Optional[Union[datetime.tzinfo, str]] = None,
+) -> Tuple[pd.DataFrame, float]:
+    """Load selected datastreams of a NilsPod binary (.bin) file by decoding the packet stream directly.
+
+    Instead of creating a full :class:`~nilspodlib.dataset.Dataset` object, only the header is parsed using
+    ``nilspodlib`` and the packet stream is decoded with a NumPy structured dtype that only extracts the selected
+    datastreams and the counter. Legacy file versions are converted the same way as in ``nilspodlib``
+    (``legacy_support="resolve"``), and counter inconsistencies are handled like in
+    :func:`~biopsykit.io.nilspod.load_dataset_nilspod` with ``handle_counter_inconsistency="ignore"``. Hence, the
+    output is equal to the output of :func:`~biopsykit.io.nilspod.load_dataset_nilspod`.
+
+    If the file can not be decoded directly (unknown sensors or datastreams that require calibration), the file is
+    loaded using :func:`~biopsykit.io.nilspod.load_dataset_nilspod` instead.
+
+    .. note:: This function relies on internals of ``nilspodlib`` (header parsing and legacy conversion), which is
+              therefore pinned to a minor version in the package requirements.
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to binary file
+    datastreams : str or list of str, optional
+        list of datastreams to load. Default: "ecg"
+    timezone : str or :class:`datetime.tzinfo`, optional
+        timezone of the acquired data, either as string of as tzinfo object.
+        Default: "Europe/Berlin"
+
+    Returns
+    -------
+    tuple
+        df : :class:`~pandas.DataFrame`
+            dataframe of imported dataset
+        fs : float
+            sampling rate
+
+    Raises
+    ------
+    :exc:`~nilspodlib.exceptions.VersionError`
+        if the firmware version of the file is not supported by ``nilspodlib``
+
+    """
+    if timezone is None:
+        timezone = tz
+    if isinstance(datastreams, str):
+        datastreams = [datastreams]
+
+    header_bytes, data_bytes = get_header_and_data_bytes(file_path)
+    version = get_strict_version_from_header_bytes(header_bytes)
+    # raises a VersionError for unsupported firmware versions, just like nilspodlib
+    header_bytes, data_bytes = find_conversion_function(version, in_memory=True)(header_bytes, data_bytes)
+
+    info = Header.from_bin_array(header_bytes[1:], tz=timezone)
+    packet_dtype = _nilspod_packet_dtype(info, datastreams)
+    if packet_dtype is None:
+        return _load_nilspod_bin_fallback(file_path, datastreams, timezone)
+
+    data = read_binary_uint8(data_bytes, info.sample_size, info.n_samples)
+    packets = np.frombuffer(np.ascontiguousarray(data), dtype=packet_dtype)
+    counter = packets["counter"].astype(float)
+
+    if info.strict_version_firmware >= Version("0.13.0") and len(counter) != info.n_samples:
+        warnings.warn(
+            "The number of samples in the dataset does not match the number indicated by the header. "
+            "This might indicate a corrupted file",
+            LegacyWarning,
+        )
+
+    # edge case: if only the last sample is corrupted, cut the dataset
+    idxs_corrupted = np.where(np.diff(counter) < 1)[0]
+    n_samples = len(counter)
+    if len(idxs_corrupted) == 1 and (idxs_corrupted[0] == len(counter) - 2):
+        n_samples = idxs_corrupted[0]
+
+    datastreams = [ds for ds in info.enabled_sensors if ds in datastreams]
+    columns = [col for ds in datastreams for col in SENSOR_LEGENDS[ds]]
+    df = pd.DataFrame(
+        np.concatenate([packets[ds][:n_samples].astype(float) for ds in datastreams], axis=1), columns=columns
+    )
+
+    utc_counter = info.utc_datetime_start_day_midnight.timestamp() + counter[:n_samples] / info.sampling_rate_hz
+    index = pd.Series((utc_counter * 1e6).astype("datetime64[us]")).dt.tz_localize("UTC").dt.tz_convert(timezone)
+    df.index = index
+    df.index.name = "time"
+    return df, info.sampling_rate_hz
+
+
+def load_nilspod_csv_fast(
+    file_path: path_t,
+    datastreams: Optional[Union[str, Sequence[str]]] = "ecg",
+    timezone: Optional[Union[datetime.tzinfo, str]] = None,
+) -> Tuple[pd.DataFrame, float]:
+    """Load selected datastreams of a csv file recorded by NilsPod.
+
+    In contrast to :func:`~biopsykit.io.nilspod.load_csv_nilspod`, only the timestamp column and the columns of the
+    selected datastreams are parsed from the file. The output is equal to the output of
+    :func:`~biopsykit.io.nilspod.load_csv_nilspod` with the same ``datastreams``. The file name is expected to have
+    the pattern "NilsPodX-<sensor-id>_YYYYMMDD_hhmmss.csv".
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to csv file
+    datastreams : str or list of str, optional
+        list of datastreams to load. Default: "ecg"
+    timezone : str or :class:`datetime.tzinfo`, optional
+        timezone of the acquired data, either as string of as tzinfo object.
+        Default: "Europe/Berlin"
+
+    Returns
+    -------
+    tuple
+        df : :class:`~pandas.DataFrame`
+            dataframe of imported dataset
+        fs : float
+            sampling rate
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path)
+    if timezone is None:
+        timezone = tz
+    if isinstance(datastreams, str):
+        datastreams = [datastreams]
+
+    header = pd.read_csv(file_path, header=None, nrows=1)
+    # sampling rate is in second column of header
+    sampling_rate = float(header.iloc[0, 1])
+
+    columns = list(pd.read_csv(file_path, header=1, nrows=0).columns)
+    data_columns = [col for ds in datastreams for col in columns if ds in col]
+    df = pd.read_csv(file_path, header=1, usecols=["timestamp"] + data_columns, index_col="timestamp")
+    df = df[data_columns]
+
+    # convert index to nanoseconds
+    index = ((df.index / sampling_rate) * 1e9).astype(int)
+    # infer start time from filename
+    start_time = re.findall(r"NilsPodX-[^\s]{4}_(.*?).csv", str(file_path.name))
+    if len(start_time) > 0:
+        start_time = pd.to_datetime(start_time[0], format="%Y%m%d_%H%M%S").to_datetime64().astype(int)
+        df.index = pd.to_datetime(index + start_time)
+        df = df.tz_localize(tz=timezone)
+    else:
+        # no start time information available, so convert into timedelta index
+        df.index = pd.to_timedelta(index)
+    df.index.name = "time"
+    return df, sampling_rate
+
+
+def _load_nilspod_files(
+    dataset_list: Sequence[Path], datastreams: Optional[Union[str, Sequence[str]]]
+) -> Sequence[Tuple[pd.DataFrame, float]]:
+    return [
         load_dataset_nilspod(
             file_path=dataset_path,
             handle_counter_inconsistency="ignore",
@@ -86,23 +575,113 @@ def load_ecg_raw_data_folder(
         else load_csv_nilspod(file_path=dataset_path)
         for dataset_path in dataset_list
     ]
-    # remove the last second of the dataframe
-    dataset_list = [(data.iloc[: -int(fs)], fs) for (data, fs) in dataset_list]
-    dataset_dict = {phase: df for phase, (df, fs) in zip(phases, dataset_list)}
 
-    if selected_phases is not None:
-        dataset_dict = {phase: dataset_dict[phase] for phase in selected_phases}
 
-    return dataset_dict
+def _load_nilspod_bin_fallback(
+    file_path: path_t, datastreams: Sequence[str], timezone: Union[datetime.tzinfo, str]
+) -> Tuple[pd.DataFrame, float]:
+    return load_dataset_nilspod(
+        file_path=file_path,
+        handle_counter_inconsistency="ignore",
+        legacy_support="resolve",
+        datastreams=datastreams,
+        timezone=timezone,
+    )
+
+
+def _nilspod_packet_dtype(info: Header, datastreams: Sequence[str]) -> Optional[np.dtype]:
+    """Build a structured dtype describing one packet, or return ``None`` if the packet can not be decoded."""
+    if not any(ds in info.enabled_sensors for ds in datastreams):
+        return None
+    names, formats, offsets = [], [], []
+    offset = 0
+    for sensor in info.enabled_sensors:
+        if sensor not in SENSOR_SAMPLE_LENGTH:
+            return None
+        n_bytes, n_channels, dtype = SENSOR_SAMPLE_LENGTH[sensor]
+        if sensor in datastreams:
+            if sensor in _NILSPOD_CALIBRATED_DATASTREAMS:
+                return None
+            names.append(sensor)
+            formats.append((np.dtype(dtype).newbyteorder("<"), (n_channels,)))
+            offsets.append(offset)
+        offset += n_bytes
+
+    n_bytes_counter = SENSOR_SAMPLE_LENGTH["counter"][0]
+    if offset + n_bytes_counter != info.sample_size:
+        # invalid file format, let nilspodlib raise the appropriate error
+        return None
+    names.append("counter")
+    formats.append(np.dtype("<u4"))
+    offsets.append(offset)
+    return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": info.sample_size})
+
+
+def load_hr_ensemble(
+    file_path: path_t, phases: Optional[Sequence[str]] = None, subjects: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Load heart rate ensemble data written by :func:`~cft_analysis.feature_extraction.hr_ensemble.write_hr_ensemble`.
+
+    The binary file is memory-mapped, so only the selected phases and subjects are loaded into memory.
+
+    Parameters
+    ----------
+    file_path : :class:`~pathlib.Path` or str
+        path to ensemble file. The file extension is replaced by ``.npy`` and ``.json``, respectively.
+    phases : list of str, optional
+        list of phases to load or ``None`` to load all phases. Phases not contained in the file are silently ignored.
+        Default: ``None``
+    subjects : list of str, optional
+        list of subjects to load or ``None`` to load all subjects. Default: ``None``
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        dataframe with ensemble heart rate data with a (phase, time) index and one column per subject
+
+    Raises
+    ------
+    KeyError
+        if any of ``subjects`` is not contained in the file
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path)
+    with file_path.with_suffix(".json").open(encoding="utf-8") as fp:
+        metadata = json.load(fp)
+    data = np.load(file_path.with_suffix(".npy"), mmap_mode="r")
+
+    if phases is None:
+        phases = metadata["phases"]
+    if subjects is None:
+        subjects = metadata["subjects"]
+    phases = [phase for phase in phases if phase in metadata["phases"]]
+    subject_idx = pd.Index(metadata["subjects"]).get_indexer(subjects)
+    if np.any(subject_idx == -1):
+        raise KeyError("Subjects {} not found in ensemble data!".format(list(np.asarray(subjects)[subject_idx == -1])))
+
+    data_dict = {}
+    for phase in phases:
+        phase_idx = metadata["phases"].index(phase)
+        length = metadata["phase_lengths"][phase_idx]
+        time = pd.Index(metadata["time_start"] + np.arange(length) * metadata["time_step"], name="time")
+        data_dict[phase] = pd.DataFrame(
+            np.asarray(data[phase_idx, :length][:, subject_idx]), index=time, columns=pd.Index(subjects, name="subject")
+        )
+    return pd.concat(data_dict, names=["phase"])
 
 
-def load_subject_data_dicts(dataset: "CftDatasetRaw") -> Tuple[SubjectDataDict, SubjectDataDict]:  # noqa: F821
+def load_subject_data_dicts(
+    dataset: "CftDatasetRaw", subject_ids: Optional[Sequence[str]] = None  # noqa: F821
+) -> Tuple[SubjectDataDict, SubjectDataDict]:
     """Load ``SubjectDataDict`` with heart rate and r-peak data.
 
     Parameters
     ----------
     dataset : :class:`~cft_analysis.datasets.CftDatasetRaw`
         dataset object to extract file paths from
+    subject_ids : list of str, optional
+        list of subject IDs to load data from or ``None`` to load data from all subjects. Default: ``None``
 
     Returns
     -------
@@ -115,7 +694,7 @@ def load_subject_data_dicts(dataset: "CftDatasetRaw") -> Tuple[SubjectDataDict,
     subject_data_dict_hr = {}
     subject_data_dict_rpeaks = {}
 
-    subject_dirs = dataset.subject_dirs
+    subject_dirs = _filter_subject_dirs(dataset.subject_dirs, subject_ids)
     for subject_dir in tqdm(subject_dirs):
         subject_id = subject_dir.name
 
@@ -132,13 +711,17 @@ def load_subject_data_dicts(dataset: "CftDatasetRaw") -> Tuple[SubjectDataDict,
     return subject_data_dict_hr, subject_data_dict_rpeaks
 
 
-def load_subject_continuous_hrv_data(dataset: "CftDatasetRaw") -> Dict[str, Dict[str, pd.DataFrame]]:  # noqa: F821
+def load_subject_continuous_hrv_data(
+    dataset: "CftDatasetRaw", subject_ids: Optional[Sequence[str]] = None  # noqa: F821
+) -> Dict[str, Dict[str, pd.DataFrame]]:
     """Load continuous heart rate variability data.
 
     Parameters
     ----------
     dataset : :class:`~cft_analysis.datasets.CftDatasetRaw`
         dataset object to extract file paths from
+    subject_ids : list of str, optional
+        list of subject IDs to load data from or ``None`` to load data from all subjects. Default: ``None``
 
     Returns
     -------
@@ -149,7 +732,7 @@ def load_subject_continuous_hrv_data(dataset: "CftDatasetRaw") -> Dict[str, Dict
     """
     subject_data_dict_hrv = {}
 
-    subject_dirs = dataset.subject_dirs
+    subject_dirs = _filter_subject_dirs(dataset.subject_dirs, subject_ids)
     for subject_dir in tqdm(subject_dirs):
         subject_id = subject_dir.name
         hr_path = subject_dir.joinpath("processed")
@@ -158,3 +741,9 @@ def load_subject_continuous_hrv_data(dataset: "CftDatasetRaw") -> Dict[str, Dict
             hr_path.joinpath("hrv_continuous_{}.xlsx".format(subject_id)), index_col=0
         )
     return subject_data_dict_hrv
+
+
+def _filter_subject_dirs(subject_dirs: Sequence[Path], subject_ids: Optional[Sequence[str]]) -> Sequence[Path]:
+    if subject_ids is None:
+        return subject_dirs
+    return [subject_dir for subject_dir in subject_dirs if subject_dir.name in subject_ids]
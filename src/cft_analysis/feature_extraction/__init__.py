@@ -1,4 +1,4 @@
 """Module with functions for extracting features from the data in the CFT dataset."""
-from cft_analysis.feature_extraction import cft, hrv
+from cft_analysis.feature_extraction import cft, hr_ensemble, hrv, rr_artifacts, saliva
 
-__all__ = ["cft", "hrv"]
+__all__ = ["cft", "hr_ensemble", "hrv", "rr_artifacts", "saliva"]
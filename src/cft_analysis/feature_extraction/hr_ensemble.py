@@ -0,0 +1,239 @@
+"""Method(s) for computing and exporting heart rate ensemble data."""
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from biopsykit.utils.datatype_helper import SubjectDataDict
+
+from cft_analysis._types import path_t
+
+__all__ = ["compute_hr_ensemble", "hr_ensemble_from_dict", "merge_hr_ensembles", "write_hr_ensemble"]
+
+
+def compute_hr_ensemble(
+    hr_subject_data_dict: SubjectDataDict,
+    select_phases: Optional[Sequence[str]] = None,
+    normalize_to: Optional[str] = "Pre",
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Compute heart rate ensemble data of all subjects as one contiguous array.
+
+    This function is equivalent to computing ensemble data using
+    :meth:`~biopsykit.protocols.MIST.compute_hr_ensemble` with ``normalize_to`` and ``select_phases`` parameters, but
+    processes all subjects of one phase at once instead of resampling and normalizing each subject and phase
+    separately:
+
+    * Heart rate data of each subject and phase is resampled to 1 Hz (linear interpolation).
+    * Heart rate data is normalized to the mean heart rate of the phase ``normalize_to`` for each subject.
+    * Heart rate data of each phase is cut to the shortest duration of all subjects in this phase.
+
+    Parameters
+    ----------
+    hr_subject_data_dict : :obj:`~biopsykit.utils.datatype_helper.HeartRateSubjectDict`
+        ``HeartRateSubjectDict`` as returned by :func:`~cft_analysis.datasets.helper.load_subject_data_dicts`
+    select_phases : list of str, optional
+        list of phases to include in the ensemble data or ``None`` to include all phases. Default: ``None``
+    normalize_to : str, optional
+        phase to normalize heart rate data to or ``None`` to not normalize data. Default: "Pre"
+
+    Returns
+    -------
+    data : :class:`~numpy.ndarray`
+        heart rate ensemble data with shape (phase x time x subject). Phases shorter than the longest phase are
+        padded with NaN.
+    metadata : dict
+        dictionary with metadata describing the array dimensions
+
+    """
+    subjects = list(hr_subject_data_dict.keys())
+    if select_phases is None:
+        select_phases = list(hr_subject_data_dict[subjects[0]].keys())
+
+    resampled_dict = {}
+    for phase in set(select_phases) | ({normalize_to} - {None}):
+        resampled_dict[phase] = _resample_sec_subjects(
+            [hr_subject_data_dict[s][phase] for s in subjects], ["{}/{}".format(s, phase) for s in subjects]
+        )
+
+    if normalize_to is not None:
+        bl_mean = np.nanmean(resampled_dict[normalize_to], axis=0)
+        resampled_dict = {phase: (data - bl_mean) / bl_mean * 100 for phase, data in resampled_dict.items()}
+
+    # cut each phase to the shortest duration of all subjects
+    phase_lengths = [int(np.min(np.sum(~np.isnan(resampled_dict[phase]), axis=0))) for phase in select_phases]
+    data = np.full((len(select_phases), max(phase_lengths), len(subjects)), np.nan)
+    for i, (phase, length) in enumerate(zip(select_phases, phase_lengths)):
+        data[i, :length] = resampled_dict[phase][:length]
+
+    return data, _hr_ensemble_metadata(data, list(select_phases), subjects, phase_lengths, normalize_to)
+
+
+def hr_ensemble_from_dict(
+    ensemble_dict: Dict[str, pd.DataFrame], normalize_to: Optional[str] = "Pre"
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Convert heart rate ensemble data from a dictionary of dataframes into one contiguous array.
+
+    This function can be used to convert ensemble data computed by
+    :meth:`~biopsykit.protocols.MIST.compute_hr_ensemble` (or exported into an Excel file by
+    :meth:`~biopsykit.protocols.MIST.export_hr_ensemble`) into the format written by
+    :func:`~cft_analysis.feature_extraction.hr_ensemble.write_hr_ensemble`.
+
+    Parameters
+    ----------
+    ensemble_dict : dict
+        dictionary with phase names as keys and dataframes with ensemble data (time x subject) as values
+    normalize_to : str, optional
+        phase the ensemble data was normalized to, only stored as metadata. Default: "Pre"
+
+    Returns
+    -------
+    data : :class:`~numpy.ndarray`
+        heart rate ensemble data with shape (phase x time x subject)
+    metadata : dict
+        dictionary with metadata describing the array dimensions
+
+    """
+    phases = list(ensemble_dict.keys())
+    subjects = list(ensemble_dict[phases[0]].columns)
+    phase_lengths = [len(ensemble_dict[phase]) for phase in phases]
+    data = np.full((len(phases), max(phase_lengths), len(subjects)), np.nan)
+    for i, (phase, length) in enumerate(zip(phases, phase_lengths)):
+        data[i, :length] = ensemble_dict[phase][subjects].to_numpy()
+
+    return data, _hr_ensemble_metadata(data, phases, subjects, phase_lengths, normalize_to)
+
+
+def merge_hr_ensembles(ensemble_list: Sequence[Tuple[np.ndarray, Dict[str, Any]]]) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Merge heart rate ensemble data computed for disjoint sets of subjects into one array.
+
+    Each phase is cut to the shortest duration over all ensembles, which yields the same result as computing the
+    ensemble data of all subjects at once.
+
+    Parameters
+    ----------
+    ensemble_list : list of tuple
+        list of (data, metadata) tuples as returned by
+        :func:`~cft_analysis.feature_extraction.hr_ensemble.compute_hr_ensemble`
+
+    Returns
+    -------
+    data : :class:`~numpy.ndarray`
+        merged heart rate ensemble data with shape (phase x time x subject)
+    metadata : dict
+        dictionary with metadata describing the array dimensions
+
+    Raises
+    ------
+    ValueError
+        if ``ensemble_list`` is empty, if the ensembles do not contain the same phases or were not normalized to the
+        same phase, or if subjects are contained in more than one ensemble
+
+    """
+    if len(ensemble_list) == 0:
+        raise ValueError("At least one ensemble is required for merging!")
+    metadata_list = [metadata for _, metadata in ensemble_list]
+    phases = metadata_list[0]["phases"]
+    normalize_to = metadata_list[0]["normalize_to"]
+    if any(metadata["phases"] != phases or metadata["normalize_to"] != normalize_to for metadata in metadata_list):
+        raise ValueError("All ensembles must contain the same phases and be normalized to the same phase!")
+
+    subjects = [subject for metadata in metadata_list for subject in metadata["subjects"]]
+    if len(set(subjects)) != len(subjects):
+        raise ValueError("Subjects must not be contained in more than one ensemble!")
+
+    phase_lengths = np.min([metadata["phase_lengths"] for metadata in metadata_list], axis=0).tolist()
+    data = np.concatenate([data[:, : max(phase_lengths)] for data, _ in ensemble_list], axis=-1)
+    for i, length in enumerate(phase_lengths):
+        data[i, length:] = np.nan
+
+    return data, _hr_ensemble_metadata(data, phases, subjects, phase_lengths, normalize_to)
+
+
+def write_hr_ensemble(data: np.ndarray, metadata: Dict[str, Any], file_path: path_t):
+    """Write heart rate ensemble data to a binary file with a metadata sidecar file.
+
+    The data is stored as contiguous (phase x time x subject) array in a NumPy ``.npy`` file (which can be
+    memory-mapped when loading), the metadata is stored in a ``.json`` file with the same name.
+
+    Parameters
+    ----------
+    data : :class:`~numpy.ndarray`
+        heart rate ensemble data with shape (phase x time x subject)
+    metadata : dict
+        dictionary with metadata as returned by :func:`~cft_analysis.feature_extraction.hr_ensemble.compute_hr_ensemble`
+    file_path : :class:`~pathlib.Path` or str
+        path to export file. The file extension is replaced by ``.npy`` and ``.json``, respectively.
+
+    """
+    # ensure pathlib
+    file_path = Path(file_path)
+    np.save(file_path.with_suffix(".npy"), np.ascontiguousarray(data))
+    with file_path.with_suffix(".json").open("w", encoding="utf-8") as fp:
+        json.dump(metadata, fp, indent=4)
+
+
+def _resample_sec_subjects(data_list: Sequence[pd.DataFrame], names: Sequence[str]) -> np.ndarray:
+    """Resample the data of multiple subjects to 1 Hz at once.
+
+    This is equivalent to calling :func:`~biopsykit.utils.data_processing.resample_sec` on each dataframe, but
+    interpolates the data of all subjects with one single call to :func:`numpy.interp`. Returns an array with shape
+    (time x subject), padded with NaN. ``names`` are only used for error messages.
+    """
+    x_list = [_time_since_start(data.index) for data in data_list]
+    y_list = [np.asarray(data, dtype=float).ravel() for data in data_list]
+    # the last two samples with distinct time stamps define the slope for extrapolating beyond the last sample
+    idx_prev = []
+    for x, name in zip(x_list, names):
+        idx_distinct = np.where(x < x[-1])[0] if len(x) > 0 else []
+        if len(idx_distinct) == 0:
+            raise ValueError(
+                "Heart rate data of '{}' must contain at least two samples with distinct time stamps "
+                "for resampling!".format(name)
+            )
+        idx_prev.append(idx_distinct[-1])
+    x_last = np.array([x[-1] for x in x_list])
+    lengths = np.ceil(x_last).astype(int)
+
+    # shift the time axis of each subject so that all subjects can be interpolated in one call
+    offsets = np.arange(len(data_list)) * (np.max(lengths) + 2.0)
+    x_all = np.concatenate([x + offset for x, offset in zip(x_list, offsets)])
+    y_all = np.concatenate(y_list)
+
+    x_new = np.arange(1, np.max(lengths) + 1, dtype=float)[:, None]
+    data = np.interp(x_new + offsets, x_all, y_all)
+
+    # linearly extrapolate beyond the last sample (as done by resample_sec) and pad with NaN after the end
+    slope_last = np.array([(y[-1] - y[i]) / (x[-1] - x[i]) for x, y, i in zip(x_list, y_list, idx_prev)])
+    y_last = np.array([y[-1] for y in y_list])
+    data = np.where(x_new > x_last, y_last + slope_last * (x_new - x_last), data)
+    data[x_new > lengths] = np.nan
+    return data
+
+
+def _time_since_start(index: pd.Index) -> np.ndarray:
+    if len(index) == 0:
+        return np.zeros(0)
+    if isinstance(index, pd.DatetimeIndex):
+        return np.asarray((index - index[0]).total_seconds(), dtype=float)
+    return np.asarray(index - index[0], dtype=float)
+
+
+def _hr_ensemble_metadata(
+    data: np.ndarray,
+    phases: Sequence[str],
+    subjects: Sequence[str],
+    phase_lengths: Sequence[int],
+    normalize_to: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "dims": ["phase", "time", "subject"],
+        "shape": list(data.shape),
+        "dtype": str(data.dtype),
+        "phases": list(phases),
+        "subjects": list(subjects),
+        "phase_lengths": [int(length) for length in phase_lengths],
+        "time_start": 1,
+        "time_step": 1,
+        "normalize_to": normalize_to,
+    }
@@ -1,22 +1,52 @@
 """Method(s) for extracting continuous HRV parameter."""
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, Union
 
 import neurokit2 as nk
+import numpy as np
 import pandas as pd
 from biopsykit.signals.ecg import EcgProcessor
-from biopsykit.utils.array_handling import sliding_window
 from biopsykit.utils.datatype_helper import RPeakDataFrame
 
-__all__ = ["hrv_continuous"]
+from cft_analysis.feature_extraction.rr_artifacts import correct_rpeak_artifacts
+
+__all__ = ["hrv_continuous", "hrv_continuous_dict", "hrv_continuous_dict_corrected", "HRV_FREQUENCY_BANDS"]
 
 from tqdm.auto import tqdm
 
+HRV_FREQUENCY_BANDS = {"VLF": (0.0033, 0.04), "LF": (0.04, 0.15), "HF": (0.15, 0.4), "VHF": (0.4, 0.5)}
+"""Frequency bands (in Hz) used for computing frequency-domain HRV parameters."""
+
 
-def hrv_continuous(rpeaks: RPeakDataFrame, sampling_rate: Optional[float] = 256.0) -> pd.DataFrame:
+def hrv_continuous(
+    rpeaks: RPeakDataFrame,
+    sampling_rate: Optional[float] = 256.0,
+    window_beats: Optional[int] = 10,
+    overlap_beats: Optional[int] = 9,
+    window_sec: Optional[float] = None,
+    step_sec: Optional[float] = 1.0,
+    hrv_types: Optional[Union[str, Sequence[str]]] = "hrv_time",
+    resample_rate: Optional[float] = 4.0,
+    block_size: Optional[int] = 1000,
+) -> pd.DataFrame:
     """Perform continuous HRV parameter computation on sliding windows of R peaks.
 
-    The windowing is performed on the R peak samples with a window size of N = 10 samples (R peaks) and a
-    shift of 1 sample.
+    By default, the windowing is performed on the R peak samples with a window size of N = 10 samples (R peaks) and
+    a shift of 1 sample. Alternatively, time-based windows can be used by specifying ``window_sec`` (and ``step_sec``).
+    The index of each window is the time of its first R peak (beat-based windows) or its start time (time-based
+    windows).
+
+    Time-domain HRV parameters (``hrv_types="hrv_time"``) are computed for each window using
+    :func:`neurokit2.hrv_time`. Frequency-domain HRV parameters (``hrv_types="hrv_frequency"``) are computed for all
+    windows at once: The RR intervals of each window are linearly interpolated onto a grid with the same number of
+    samples for every window, and band powers are computed from the periodogram of all windows in one batch.
+    Only RR intervals within a window are used for its interpolation, i.e., the first (last) RR interval of a window
+    is held constant before (after) its first (last) R peak pair. To bound memory usage, windows are processed in
+    blocks of ``block_size`` windows.
+
+    .. note:: Frequency bands with a lower frequency limit below the frequency resolution of a window
+              (i.e., 1 / window duration) can not be resolved and are set to NaN. For example, LF power requires
+              windows of at least 25 s, VLF power windows of at least 303 s.
 
     Parameters
     ----------
@@ -24,39 +54,299 @@ def hrv_continuous(rpeaks: RPeakDataFrame, sampling_rate: Optional[float] = 256.
         dataframe with R peaks
     sampling_rate : float, optional
         sampling rate of the source data. Default: 256.0 Hz
+    window_beats : int, optional
+        window size in number of R peaks. Only used if ``window_sec`` is ``None``. Default: 10
+    overlap_beats : int, optional
+        overlap of consecutive windows in number of R peaks. Only used if ``window_sec`` is ``None``. Default: 9
+    window_sec : float, optional
+        window size in seconds or ``None`` to use beat-based windows. Default: ``None``
+    step_sec : float, optional
+        shift between consecutive time-based windows in seconds. Default: 1.0
+    hrv_types : str or list of str, optional
+        HRV parameter types to compute. Can be "hrv_time", "hrv_frequency", or a list of both. Default: "hrv_time"
+    resample_rate : float, optional
+        rate (in Hz) used to determine the number of interpolated samples per window for frequency-domain HRV
+        parameters. The number of samples is computed from the median window duration. Default: 4.0 Hz
+    block_size : int, optional
+        number of windows processed at once when computing frequency-domain HRV parameters. Default: 1000
 
     Returns
     -------
     :class:`~pandas.DataFrame`
-        dataframe with HRV parameters per sliding window
+        dataframe with HRV parameters per sliding window. If ``rpeaks`` is empty or does not contain enough R peaks
+        for a single window, an empty dataframe with the HRV parameter columns is returned
+
+    Raises
+    ------
+    ValueError
+        if an invalid value for ``hrv_types`` or invalid window parameters are passed
 
     """
-    if isinstance(rpeaks.index, pd.DatetimeIndex):
-        rpeaks_idx = pd.to_datetime(
-            sliding_window(pd.to_numeric(rpeaks.index), window_samples=10, overlap_samples=9)[:, 0]
+    _assert_valid_window_parameters(window_beats, overlap_beats, window_sec, step_sec)
+    if isinstance(hrv_types, str):
+        hrv_types = [hrv_types]
+    if any(hrv_type not in ["hrv_time", "hrv_frequency"] for hrv_type in hrv_types):
+        raise ValueError(
+            "Invalid 'hrv_types'! Expected one of 'hrv_time' or 'hrv_frequency', got {}.".format(hrv_types)
         )
-    else:
-        rpeaks_idx = sliding_window(rpeaks.index, window_samples=10, overlap_samples=9)[:, 0]
 
-    rpeaks_sliding_window = sliding_window(rpeaks[["R_Peak_Idx"]], window_samples=10, overlap_samples=9)
-    rpeaks_sliding_window = pd.DataFrame(rpeaks_sliding_window, index=rpeaks_idx)
-    rpeaks_sliding_window = rpeaks_sliding_window.dropna()
+    rpeak_idx = rpeaks["R_Peak_Idx"].to_numpy(dtype=float)
+    if window_sec is not None:
+        # time-based windows require valid R peak positions
+        mask_valid = ~np.isnan(rpeak_idx)
+        rpeaks = rpeaks.loc[mask_valid]
+        rpeak_idx = rpeak_idx[mask_valid]
 
-    return rpeaks_sliding_window.apply(lambda row: nk.hrv_time(row, sampling_rate=int(sampling_rate)).squeeze(), axis=1)
+    rpeak_times = rpeak_idx / sampling_rate
+    if len(rpeak_times) > 0:
+        idx_start, idx_stop, t_start, t_stop = _rpeak_windows(
+            rpeak_times,
+            window_beats=window_beats,
+            overlap_beats=overlap_beats,
+            window_sec=window_sec,
+            step_sec=step_sec,
+        )
+        index = _window_index(rpeaks, idx_start, t_start - rpeak_times[0], time_based=window_sec is not None)
+    else:
+        # no (valid) R peaks => no windows
+        idx_start = idx_stop = np.zeros(0, dtype=int)
+        t_start = t_stop = np.zeros(0)
+        index = rpeaks.index[:0]
+
+    results = []
+    if "hrv_time" in hrv_types:
+        results.append(_hrv_time_windows(rpeak_idx, idx_start, idx_stop, sampling_rate, index))
+    if "hrv_frequency" in hrv_types:
+        results.append(
+            _hrv_frequency_windows(
+                rpeak_times,
+                idx_start,
+                idx_stop,
+                t_start,
+                t_stop,
+                index,
+                resample_rate=resample_rate,
+                block_size=block_size,
+            )
+        )
+    return pd.concat(results, axis=1)
 
 
-def hrv_continuous_dict(ecg_processor: EcgProcessor) -> Dict[str, pd.DataFrame]:
+def hrv_continuous_dict(
+    ecg_processor: EcgProcessor, correct_artifacts: Optional[bool] = False, **kwargs
+) -> Dict[str, pd.DataFrame]:
     """Extract continuous heart rate variability (HRV) data from a dictionary of data.
 
+    Optionally, artifacts in the RR intervals (ectopic, missed, extra, and long/short beats) of all phases are
+    corrected at once before computing HRV parameters. Use
+    :func:`~cft_analysis.feature_extraction.hrv.hrv_continuous_dict_corrected` to additionally get the report of
+    corrected artifacts.
+
+    Parameters
+    ----------
+    ecg_processor : :class:`~biopsykit.signals.ecg.EcgProcessor`
+        ``EcgProcessor`` instance to extract R-peak data from
+    correct_artifacts : bool, optional
+        ``True`` to correct RR interval artifacts before computing HRV parameters, ``False`` otherwise.
+        Default: ``False``
+    **kwargs
+        additional parameters passed to :func:`~cft_analysis.feature_extraction.hrv.hrv_continuous`,
+        e.g., to configure the windowing or the HRV parameter types
+
+    Returns
+    -------
+    dict
+        dictionary with continuous HRV data
+
+    """
+    if correct_artifacts:
+        return hrv_continuous_dict_corrected(ecg_processor, **kwargs)[0]
+    kwargs.setdefault("sampling_rate", ecg_processor.sampling_rate)
+    return _hrv_continuous_dict(ecg_processor.rpeaks, **kwargs)
+
+
+def hrv_continuous_dict_corrected(
+    ecg_processor: EcgProcessor, **kwargs
+) -> Tuple[Dict[str, pd.DataFrame], pd.DataFrame]:
+    """Extract continuous heart rate variability (HRV) data from a dictionary of data after correcting artifacts.
+
+    Artifacts in the RR intervals (ectopic, missed, extra, and long/short beats) of all phases are corrected at once
+    using :func:`~cft_analysis.feature_extraction.rr_artifacts.correct_rpeak_artifacts` before computing HRV
+    parameters.
+
     Parameters
     ----------
     ecg_processor : :class:`~biopsykit.signals.ecg.EcgProcessor`
         ``EcgProcessor`` instance to extract R-peak data from
+    **kwargs
+        additional parameters passed to :func:`~cft_analysis.feature_extraction.hrv.hrv_continuous`,
+        e.g., to configure the windowing or the HRV parameter types
 
     Returns
     -------
     dict
         dictionary with continuous HRV data
+    :class:`~pandas.DataFrame`
+        number of corrected artifacts and fraction of corrected beats per phase
 
     """
-    return {key: hrv_continuous(rpeaks) for key, rpeaks in tqdm(list(ecg_processor.rpeaks.items()), desc="HRV")}
+    kwargs.setdefault("sampling_rate", ecg_processor.sampling_rate)
+    rpeak_dict, report = correct_rpeak_artifacts(
+        ecg_processor.rpeaks, sampling_rate=kwargs["sampling_rate"], index_names=["phase"]
+    )
+    return _hrv_continuous_dict(rpeak_dict, **kwargs), report
+
+
+def _hrv_continuous_dict(rpeak_dict: Dict[str, RPeakDataFrame], **kwargs) -> Dict[str, pd.DataFrame]:
+    return {key: hrv_continuous(rpeaks, **kwargs) for key, rpeaks in tqdm(list(rpeak_dict.items()), desc="HRV")}
+
+
+def _assert_valid_window_parameters(
+    window_beats: int, overlap_beats: int, window_sec: Optional[float], step_sec: float
+):
+    if window_sec is None:
+        if window_beats < 1:
+            raise ValueError("'window_beats' must be at least 1, got {}!".format(window_beats))
+        if not 0 <= overlap_beats < window_beats:
+            raise ValueError(
+                "'overlap_beats' must be non-negative and smaller than 'window_beats' ({}), got {}!".format(
+                    window_beats, overlap_beats
+                )
+            )
+        return
+    if not window_sec > 0:
+        raise ValueError("'window_sec' must be positive, got {}!".format(window_sec))
+    if not step_sec > 0:
+        raise ValueError("'step_sec' must be positive, got {}!".format(step_sec))
+
+
+def _rpeak_windows(
+    rpeak_times: np.ndarray,
+    window_beats: int,
+    overlap_beats: int,
+    window_sec: Optional[float],
+    step_sec: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the R peak (index) ranges and the start and stop times (in seconds) of each window."""
+    if window_sec is None:
+        idx_start = np.arange(0, len(rpeak_times) - window_beats + 1, window_beats - overlap_beats)
+        idx_stop = idx_start + window_beats
+        # drop windows containing invalid R peaks
+        n_invalid = np.concatenate([[0], np.cumsum(np.isnan(rpeak_times))])
+        mask_valid = (n_invalid[idx_stop] - n_invalid[idx_start]) == 0
+        idx_start = idx_start[mask_valid]
+        idx_stop = idx_stop[mask_valid]
+        return idx_start, idx_stop, rpeak_times[idx_start], rpeak_times[idx_stop - 1]
+
+    n_windows = max(int(np.floor((rpeak_times[-1] - rpeak_times[0] - window_sec) / step_sec)) + 1, 0)
+    t_start = rpeak_times[0] + np.arange(n_windows) * step_sec
+    t_stop = t_start + window_sec
+    idx_start = np.searchsorted(rpeak_times, t_start, side="left")
+    idx_stop = np.searchsorted(rpeak_times, t_stop, side="right")
+    return idx_start, idx_stop, t_start, t_stop
+
+
+def _window_index(rpeaks: RPeakDataFrame, idx_start: np.ndarray, t_offset: np.ndarray, time_based: bool) -> pd.Index:
+    if isinstance(rpeaks.index, pd.DatetimeIndex):
+        index_ns = pd.to_numeric(rpeaks.index).to_numpy()
+        if time_based:
+            return pd.to_datetime(index_ns[0] + np.round(t_offset * 1e9).astype(np.int64))
+        return pd.to_datetime(index_ns[idx_start])
+    if time_based:
+        return pd.Index(rpeaks.index[0] + t_offset, name=rpeaks.index.name)
+    return rpeaks.index[idx_start]
+
+
+def _hrv_time_windows(
+    rpeak_idx: np.ndarray, idx_start: np.ndarray, idx_stop: np.ndarray, sampling_rate: float, index: pd.Index
+) -> pd.DataFrame:
+    # windows with less than three R peaks (two RR intervals) are not meaningful
+    mask_valid = (idx_stop - idx_start) >= 3
+    hrv_list = [
+        nk.hrv_time(rpeak_idx[start:stop], sampling_rate=int(sampling_rate)).squeeze()
+        for start, stop in zip(idx_start[mask_valid], idx_stop[mask_valid])
+    ]
+    if len(hrv_list) == 0:
+        return pd.DataFrame(columns=_hrv_time_columns(), index=index[:0], dtype=float)
+    hrv_data = pd.DataFrame(hrv_list)
+    hrv_data.index = index[mask_valid]
+    return hrv_data
+
+
+@lru_cache(maxsize=1)
+def _hrv_time_columns() -> Sequence[str]:
+    """Return the names of the time-domain HRV parameters computed by :func:`neurokit2.hrv_time`."""
+    rpeak_idx = np.cumsum([200, 210, 190, 205, 215, 195, 200, 220, 190, 200])
+    return list(nk.hrv_time(rpeak_idx, sampling_rate=256).columns)
+
+
+def _hrv_frequency_windows(
+    rpeak_times: np.ndarray,
+    idx_start: np.ndarray,
+    idx_stop: np.ndarray,
+    t_start: np.ndarray,
+    t_stop: np.ndarray,
+    index: pd.Index,
+    resample_rate: float,
+    block_size: int,
+) -> pd.DataFrame:
+    # RR intervals in ms, located at the time of the second R peak
+    rr_intervals = np.diff(rpeak_times) * 1000
+    rr_times = rpeak_times[1:]
+    mask_rr = ~np.isnan(rr_intervals)
+    rr_intervals = rr_intervals[mask_rr]
+    rr_times = rr_times[mask_rr]
+
+    band_power = np.full((len(t_start), len(HRV_FREQUENCY_BANDS)), np.nan)
+    if len(t_start) == 0:
+        return _band_power_to_dataframe(band_power, index)
+
+    durations = t_stop - t_start
+    n_samples = max(int(np.round(np.median(durations) * resample_rate)), 4)
+    # common grid of relative positions within each window
+    grid = np.arange(n_samples) / n_samples
+    taper = np.hanning(n_samples)
+    taper_scale = np.sum(taper**2)
+    bins = np.arange(n_samples // 2 + 1)
+
+    mask_valid = ((idx_stop - idx_start) >= 3) & (durations > 0)
+    windows_valid = np.where(mask_valid)[0]
+    for block_start in range(0, len(windows_valid), block_size):
+        block = windows_valid[block_start : block_start + block_size]
+        duration = durations[block][:, None]
+
+        # interpolate all windows of the block onto the common grid and remove the mean. RR intervals are located at
+        # their second R peak, so only the RR intervals between the second and the last R peak of a window belong to
+        # the window => clip the grid to this range to not use the RR intervals of neighboring windows
+        t_grid = np.clip(
+            t_start[block][:, None] + grid * duration,
+            rpeak_times[idx_start[block] + 1][:, None],
+            rpeak_times[idx_stop[block] - 1][:, None],
+        )
+        segments = np.interp(t_grid, rr_times, rr_intervals)
+        segments -= np.mean(segments, axis=1, keepdims=True)
+
+        # one-sided periodogram (in ms^2/Hz) of each window with frequency resolution 1 / duration
+        psd = np.abs(np.fft.rfft(segments * taper, axis=1)) ** 2 * duration / (n_samples * taper_scale)
+        psd[:, 1 : (n_samples + 1) // 2] *= 2
+        freqs = bins / duration
+
+        for i, (f_low, f_high) in enumerate(HRV_FREQUENCY_BANDS.values()):
+            mask_band = (freqs >= f_low) & (freqs < f_high)
+            power = np.sum(psd * mask_band, axis=1) / duration[:, 0]
+            # bands with a lower frequency limit below the frequency resolution can not be resolved by the window
+            mask_resolved = np.any(mask_band, axis=1) & (duration[:, 0] >= 1 / f_low)
+            band_power[block, i] = np.where(mask_resolved, power, np.nan)
+
+    return _band_power_to_dataframe(band_power, index)
+
+
+def _band_power_to_dataframe(band_power: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    hrv_data = pd.DataFrame(band_power, index=index, columns=["HRV_{}".format(band) for band in HRV_FREQUENCY_BANDS])
+    total_power = np.nansum(band_power, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hrv_data["HRV_LFHF"] = hrv_data["HRV_LF"] / hrv_data["HRV_HF"]
+        hrv_data["HRV_LFn"] = hrv_data["HRV_LF"] / total_power
+        hrv_data["HRV_HFn"] = hrv_data["HRV_HF"] / total_power
+        hrv_data["HRV_LnHF"] = np.log(hrv_data["HRV_HF"])
+    return hrv_data
@@ -0,0 +1,429 @@
+"""Method(s) for detecting and correcting artifacts in RR intervals of (batches of) R-peak data."""
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from biopsykit.utils.datatype_helper import RPeakDataFrame
+
+__all__ = ["RR_ARTIFACT_TYPES", "correct_rpeak_artifacts", "detect_rpeak_artifacts"]
+
+RR_ARTIFACT_TYPES = ["ectopic", "missed", "extra", "longshort"]
+"""Types of RR interval artifacts according to Lipponen & Tarvainen (2019)."""
+
+rpeak_batch_t = Union[  # pylint:disable=invalid-name
+    RPeakDataFrame, Dict[str, RPeakDataFrame], Dict[str, Dict[str, RPeakDataFrame]]
+]
+
+# number of beats processed at once when computing rolling statistics (to bound memory usage)
+_BLOCK_SIZE = 10000
+# R-peak series with less beats are not checked for artifacts
+_MIN_BEATS = 4
+
+
+def detect_rpeak_artifacts(
+    rpeaks: rpeak_batch_t,
+    sampling_rate: Optional[float] = 256.0,
+    **kwargs,
+) -> Union[pd.Series, Dict[str, pd.Series], Dict[str, Dict[str, pd.Series]]]:
+    """Detect ectopic, missed, extra, and long/short beats in R-peak data.
+
+    Artifacts are detected from the series of successive RR interval differences and the deviation of RR intervals
+    from their running median, using time-varying thresholds as proposed by Lipponen & Tarvainen (2019).
+    All R-peak series of a batch are processed at once, i.e., without iterating over subjects, phases, or beats.
+
+    Parameters
+    ----------
+    rpeaks : :obj:`~biopsykit.utils.datatype_helper.RPeakDataFrame` or dict
+        R-peak data. Either a single ``RPeakDataFrame``, a dictionary of ``RPeakDataFrame`` (e.g., one per phase), or
+        a nested dictionary of ``RPeakDataFrame`` (e.g., one per subject and phase, as returned by
+        :func:`~cft_analysis.datasets.helper.load_subject_data_dicts`)
+    sampling_rate : float, optional
+        sampling rate of the source data. Default: 256.0 Hz
+    **kwargs
+        additional parameters of the detection algorithm: ``c1`` (default: 0.13), ``c2`` (default: 0.17),
+        ``alpha`` (default: 5.2), ``window_width`` (default: 91), and ``medfilt_order`` (default: 11)
+
+    Returns
+    -------
+    :class:`~pandas.Series` or dict
+        series with the artifact type of each beat (one of
+        :obj:`~cft_analysis.feature_extraction.rr_artifacts.RR_ARTIFACT_TYPES` or ``None`` for normal beats),
+        or a (nested) dictionary of such, with the same structure as ``rpeaks``
+
+    References
+    ----------
+    Lipponen, J. A., & Tarvainen, M. P. (2019). A robust algorithm for heart rate variability time series artefact
+    correction using novel beat classification. Journal of Medical Engineering & Technology, 43(3), 173–181.
+    https://doi.org/10.1080/03091902.2019.1640306
+
+    """
+    rpeak_dict = _flatten_rpeak_dict(rpeaks)
+    peaks, group = _rpeak_dict_to_flat(rpeak_dict)
+    artifacts = _detect_artifacts(peaks, group, len(rpeak_dict), sampling_rate, **kwargs)
+
+    labels = np.array([None] + RR_ARTIFACT_TYPES, dtype=object)[artifacts]
+    result = {}
+    for i, (key, data) in enumerate(rpeak_dict.items()):
+        data = data.dropna(subset=["R_Peak_Idx"])
+        result[key] = pd.Series(labels[group == i], index=data.index, name="RR_Artifact")
+    return _unflatten_rpeak_dict(result, rpeaks)
+
+
+def correct_rpeak_artifacts(
+    rpeaks: rpeak_batch_t,
+    sampling_rate: Optional[float] = 256.0,
+    iterative: Optional[bool] = True,
+    index_names: Optional[Sequence[str]] = None,
+    **kwargs,
+) -> Tuple[rpeak_batch_t, Union[pd.Series, pd.DataFrame]]:
+    """Detect and correct ectopic, missed, extra, and long/short beats in R-peak data.
+
+    Artifacts are detected using :func:`~cft_analysis.feature_extraction.rr_artifacts.detect_rpeak_artifacts` and
+    corrected as proposed by Lipponen & Tarvainen (2019): Extra beats are removed, missed beats are inserted in the
+    middle of the surrounding beats, and ectopic as well as long/short beats are moved to the middle of their
+    neighboring beats. If ``iterative`` is ``True``, detection and correction are repeated for each R-peak series
+    as long as the number of detected artifacts decreases.
+
+    In the corrected R-peak data, ``RR_Interval`` (and ``Heart_Rate``, if present) are recomputed from the corrected
+    R-peak positions and corrected beats are marked in ``R_Peak_Outlier``. R peaks with missing ``R_Peak_Idx`` are
+    dropped.
+
+    Parameters
+    ----------
+    rpeaks : :obj:`~biopsykit.utils.datatype_helper.RPeakDataFrame` or dict
+        R-peak data. Either a single ``RPeakDataFrame``, a dictionary of ``RPeakDataFrame`` (e.g., one per phase), or
+        a nested dictionary of ``RPeakDataFrame`` (e.g., one per subject and phase, as returned by
+        :func:`~cft_analysis.datasets.helper.load_subject_data_dicts`)
+    sampling_rate : float, optional
+        sampling rate of the source data. Default: 256.0 Hz
+    iterative : bool, optional
+        ``True`` to repeat artifact correction as long as the number of artifacts decreases, ``False`` to only
+        correct artifacts once. Default: ``True``
+    index_names : list of str, optional
+        names of the index levels of ``report``, one per dictionary level of ``rpeaks`` (e.g., ``["phase"]`` or
+        ``["subject", "phase"]``), or ``None`` to leave the index levels unnamed. Ignored if ``rpeaks`` is a single
+        ``RPeakDataFrame``. Default: ``None``
+    **kwargs
+        additional parameters of the detection algorithm, see
+        :func:`~cft_analysis.feature_extraction.rr_artifacts.detect_rpeak_artifacts`
+
+    Returns
+    -------
+    rpeaks_corrected : :obj:`~biopsykit.utils.datatype_helper.RPeakDataFrame` or dict
+        corrected R-peak data with the same structure as ``rpeaks``
+    report : :class:`~pandas.Series` or :class:`~pandas.DataFrame`
+        number of corrected beats per artifact type, number of beats, and fraction of corrected beats of each R-peak
+        series (with one index level per dictionary level if ``rpeaks`` is a (nested) dictionary). Each beat is
+        counted only once, with the artifact type of its first correction, even if it is detected again in later
+        iterations. Corrected beats are the beats marked in ``R_Peak_Outlier`` (including inserted missed beats)
+        plus the removed extra beats.
+
+    Raises
+    ------
+    ValueError
+        if the number of ``index_names`` does not match the number of dictionary levels of ``rpeaks``
+
+    References
+    ----------
+    Lipponen, J. A., & Tarvainen, M. P. (2019). A robust algorithm for heart rate variability time series artefact
+    correction using novel beat classification. Journal of Medical Engineering & Technology, 43(3), 173–181.
+    https://doi.org/10.1080/03091902.2019.1640306
+
+    """
+    rpeak_dict = _flatten_rpeak_dict(rpeaks)
+    report_index = _report_index(rpeak_dict.keys(), rpeaks, index_names)
+    n_series = len(rpeak_dict)
+    peaks, group = _rpeak_dict_to_flat(rpeak_dict)
+    n_beats = np.bincount(group, minlength=n_series)
+    # index of each beat in the original data (-1 for inserted beats) and the artifact type it was corrected for
+    source = _local_index(group, n_series)[0]
+    labels = np.zeros(len(peaks), dtype=int)
+
+    n_removed = np.zeros(n_series, dtype=int)
+    n_artifacts_previous = np.full(n_series, np.iinfo(int).max)
+    active = np.ones(n_series, dtype=bool)
+    while np.any(active):
+        artifacts = _detect_artifacts(peaks, group, n_series, sampling_rate, **kwargs)
+        counts_current = _count_artifacts(artifacts, group, n_series)
+        n_artifacts_current = np.sum(counts_current, axis=1)
+
+        # only apply the correction to series where the number of artifacts decreased
+        active &= n_artifacts_current < n_artifacts_previous
+        artifacts[~active[group]] = 0
+        peaks, group, source, labels, removed = _correct_artifacts(peaks, group, n_series, source, labels, artifacts)
+        n_removed += removed
+
+        n_artifacts_previous = n_artifacts_current
+        active &= n_artifacts_current > 0
+        if not iterative:
+            break
+
+    rpeaks_corrected = {}
+    for i, (key, data) in enumerate(rpeak_dict.items()):
+        mask = group == i
+        rpeaks_corrected[key] = _rpeaks_to_dataframe(data, peaks[mask], source[mask], labels[mask] > 0, sampling_rate)
+
+    # count distinct corrected beats: beats that are still part of the data, and removed extra beats
+    counts = _count_artifacts(labels, group, n_series)
+    counts[:, RR_ARTIFACT_TYPES.index("extra")] += n_removed
+    report = pd.DataFrame(counts, columns=RR_ARTIFACT_TYPES, index=report_index)
+    report["n_beats"] = n_beats
+    report["fraction_corrected"] = np.sum(counts, axis=1) / np.maximum(n_beats, 1)
+    report.columns.name = "artifact"
+    if isinstance(rpeaks, pd.DataFrame):
+        report = report.iloc[0].rename(None)
+
+    return _unflatten_rpeak_dict(rpeaks_corrected, rpeaks), report
+
+
+def _detect_artifacts(
+    peaks: np.ndarray,
+    group: np.ndarray,
+    n_series: int,
+    sampling_rate: float,
+    c1: Optional[float] = 0.13,
+    c2: Optional[float] = 0.17,
+    alpha: Optional[float] = 5.2,
+    window_width: Optional[int] = 91,
+    medfilt_order: Optional[int] = 11,
+) -> np.ndarray:
+    """Detect artifacts in a flat array of R peaks of multiple series.
+
+    Returns an array with the artifact type of each beat, encoded as index into ``RR_ARTIFACT_TYPES`` + 1
+    (0 for normal beats).
+    """
+    local, length = _local_index(group, n_series)
+    first = local == 0
+
+    # RR intervals (in seconds), the first interval of each series is set to the mean of the series
+    rr = np.diff(peaks, prepend=0.0) / sampling_rate
+    rr[first] = _group_mean(rr, ~first, group, n_series)[group[first]]
+    # successive RR interval differences (dRRs), normalized by a time-varying threshold
+    drrs = np.diff(rr, prepend=0.0)
+    drrs[first] = _group_mean(drrs, ~first, group, n_series)[group[first]]
+    q1, q3 = _rolling_quantiles(np.abs(drrs), local, length, window_width, [0.25, 0.75])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drrs = drrs / (alpha * (q3 - q1) / 2)
+
+    # subspaces S12 and S22 from neighboring dRRs (with reflected boundaries at the start and end of each series)
+    drrs_prev, drrs_next, drrs_next2 = (drrs[_neighbor_index(local, length, offset)] for offset in [-1, 1, 2])
+    s12 = np.select(
+        [drrs > 0, drrs < 0], [np.maximum(drrs_prev, drrs_next), np.minimum(drrs_prev, drrs_next)], default=0.0
+    )
+    s22 = np.select(
+        [drrs >= 0, drrs < 0], [np.minimum(drrs_next, drrs_next2), np.maximum(drrs_next, drrs_next2)], default=0.0
+    )
+
+    # deviation of RR intervals from their running median (mRRs), normalized by a time-varying threshold
+    (medrr,) = _rolling_quantiles(rr, local, length, medfilt_order, [0.5])
+    mrrs = rr - medrr
+    mrrs[mrrs < 0] *= 2
+    q1, q3 = _rolling_quantiles(np.abs(mrrs), local, length, window_width, [0.25, 0.75])
+    th2 = alpha * (q3 - q1) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mrrs = mrrs / th2
+
+    # beats that start an evaluation of the decision flow (the last two beats of each series are not evaluated)
+    candidate = (np.abs(drrs) > 1) & (local < length - 2) & (length >= _MIN_BEATS)
+    ectopic = candidate & (((drrs > 1) & (s12 < (-c1 * drrs - c2))) | ((drrs < -1) & (s12 > (-c1 * drrs + c2))))
+    # if the following beat has a larger dRR, it is evaluated together with the current beat and then skipped
+    check_next = candidate & ~ectopic & (np.abs(_shift(drrs, -1)) < np.abs(_shift(drrs, -2)))
+    evaluated = candidate & ~_is_skipped(check_next, first)
+
+    ectopic &= evaluated
+    longshort_candidate = (evaluated & ~ectopic) | _shift(evaluated & check_next, 1, fill=False)
+
+    # classification of long/short beats into missed, extra, or long/short beats
+    long_beat = (drrs > 1) & (s22 < -1)
+    short_beat = (drrs < -1) & (s22 > 1)
+    abnormal = longshort_candidate & (long_beat | short_beat | (np.abs(mrrs) > 3))
+    extra = abnormal & short_beat & (np.abs(rr + _shift(rr, -1) - medrr) < th2)
+    missed = abnormal & ~extra & long_beat & (np.abs(rr / 2 - medrr) < th2)
+    longshort = abnormal & ~extra & ~missed
+
+    return np.select([ectopic, missed, extra, longshort], [1, 2, 3, 4], default=0)
+
+
+def _correct_artifacts(
+    peaks: np.ndarray,
+    group: np.ndarray,
+    n_series: int,
+    source: np.ndarray,
+    labels: np.ndarray,
+    artifacts: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # delete extra beats (only beats of the original data count as removed, not previously inserted beats)
+    mask_keep = artifacts != 3
+    n_removed = np.bincount(group[~mask_keep & (source >= 0)], minlength=n_series)
+    peaks, group, source, labels, artifacts = (arr[mask_keep] for arr in (peaks, group, source, labels, artifacts))
+
+    # insert missed beats in the middle of the previous and the current beat
+    local, length = _local_index(group, n_series)
+    idx_missed = np.where((artifacts == 2) & (local > 1))[0]
+    peaks_missed = (peaks[idx_missed - 1] + peaks[idx_missed]) / 2
+    peaks = np.insert(peaks, idx_missed, peaks_missed)
+    group = np.insert(group, idx_missed, group[idx_missed])
+    source = np.insert(source, idx_missed, -1)
+    labels = np.insert(labels, idx_missed, 2)
+    artifacts = np.insert(artifacts, idx_missed, 0)
+
+    # move ectopic beats, then long/short beats, to the middle of the previous and the next beat
+    local, length = _local_index(group, n_series)
+    peaks = peaks.copy()
+    labels = labels.copy()
+    for code in (1, 4):
+        idx_misaligned = np.where((artifacts == code) & (local > 1) & (local < length - 1))[0]
+        peaks[idx_misaligned] = (peaks[idx_misaligned - 1] + peaks[idx_misaligned + 1]) / 2
+        # beats that were already corrected keep the artifact type of their first correction
+        labels[idx_misaligned] = np.where(labels[idx_misaligned] > 0, labels[idx_misaligned], code)
+
+    return peaks, group, source, labels, n_removed
+
+
+def _is_skipped(check_next: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Return whether a beat is skipped because it was already evaluated together with the previous beat.
+
+    A beat is skipped if the previous beat was evaluated and requested to check the next beat. Since a skipped beat
+    can not request to check its next beat, consecutive requests alternate between evaluated and skipped beats.
+    """
+    idx = np.arange(len(check_next))
+    run_start = check_next & ~(_shift(check_next, 1, fill=False) & ~first)
+    run_start_idx = np.maximum.accumulate(np.where(run_start, idx, 0))
+    # a beat requesting to check the next beat is evaluated if it has an even position within its run of requests
+    requests = check_next & ((idx - run_start_idx) % 2 == 0)
+    return _shift(requests, 1, fill=False) & ~first
+
+
+def _rolling_quantiles(
+    values: np.ndarray, local: np.ndarray, length: np.ndarray, window: int, quantiles: Sequence[float]
+) -> Sequence[np.ndarray]:
+    """Compute centered rolling quantiles within each series (equivalent to pandas with ``min_periods=1``)."""
+    offsets = np.arange(window) - window // 2
+    results = [np.empty(len(values)) for _ in quantiles]
+    for start in range(0, len(values), _BLOCK_SIZE):
+        block = slice(start, start + _BLOCK_SIZE)
+        idx = local[block, None] + offsets
+        valid = (idx >= 0) & (idx < length[block, None])
+        idx_global = np.clip(np.arange(len(values))[block, None] + offsets, 0, len(values) - 1)
+        windows = np.where(valid, values[idx_global], np.nan)
+        # sort windows (NaN values are sorted to the end) and linearly interpolate between order statistics
+        windows = np.sort(windows, axis=1)
+        n_valid = np.sum(~np.isnan(windows), axis=1)
+        for result, quantile in zip(results, quantiles):
+            pos = quantile * (n_valid - 1)
+            lower = np.floor(pos).astype(int)
+            upper = np.ceil(pos).astype(int)
+            value_lower = np.take_along_axis(windows, lower[:, None], axis=1)[:, 0]
+            value_upper = np.take_along_axis(windows, upper[:, None], axis=1)[:, 0]
+            result[block] = value_lower + (pos - lower) * (value_upper - value_lower)
+    return results
+
+
+def _rpeaks_to_dataframe(
+    data: RPeakDataFrame, peaks: np.ndarray, source: np.ndarray, corrected: np.ndarray, sampling_rate: float
+) -> RPeakDataFrame:
+    data = data.dropna(subset=["R_Peak_Idx"])
+    # inserted beats are created from the first beat and their values are set to NaN
+    data_corrected = data.iloc[np.clip(source, 0, None)].copy()
+    data_corrected.loc[source == -1, data_corrected.columns.difference(["R_Peak_Outlier"])] = np.nan
+    if "R_Peak_Outlier" in data_corrected.columns:
+        data_corrected["R_Peak_Outlier"] = np.where(corrected, 1, data_corrected["R_Peak_Outlier"])
+    data_corrected["R_Peak_Idx"] = peaks
+
+    # recompute the time index from the R-peak positions relative to the first R peak
+    time_offset = (peaks - data["R_Peak_Idx"].iloc[0]) / sampling_rate
+    if isinstance(data.index, pd.DatetimeIndex):
+        time_offset = pd.to_timedelta(time_offset, unit="s")
+    data_corrected.index = pd.Index(data.index[0] + time_offset, name=data.index.name)
+
+    rr_interval = np.ediff1d(peaks, to_end=0) / sampling_rate
+    rr_interval[-1] = np.mean(rr_interval[:-1]) if len(rr_interval) > 1 else np.nan
+    data_corrected["RR_Interval"] = rr_interval
+    if "Heart_Rate" in data_corrected.columns:
+        data_corrected["Heart_Rate"] = 60 / rr_interval
+    return data_corrected
+
+
+def _flatten_rpeak_dict(rpeaks: rpeak_batch_t) -> Dict[Tuple, RPeakDataFrame]:
+    if isinstance(rpeaks, pd.DataFrame):
+        return {(): rpeaks}
+    rpeak_dict = {}
+    for key, value in rpeaks.items():
+        if isinstance(value, dict):
+            rpeak_dict.update({(key, k): v for k, v in value.items()})
+        else:
+            rpeak_dict[(key,)] = value
+    return rpeak_dict
+
+
+def _unflatten_rpeak_dict(rpeak_dict: Dict[Tuple, pd.DataFrame], rpeaks: rpeak_batch_t):
+    if isinstance(rpeaks, pd.DataFrame):
+        return rpeak_dict[()]
+    result = {}
+    for key, value in rpeak_dict.items():
+        if len(key) == 1:
+            result[key[0]] = value
+        else:
+            result.setdefault(key[0], {})[key[1]] = value
+    return result
+
+
+def _report_index(keys: Sequence[Tuple], rpeaks: rpeak_batch_t, index_names: Optional[Sequence[str]]) -> pd.Index:
+    if isinstance(rpeaks, pd.DataFrame):
+        return pd.RangeIndex(1)
+    keys = list(keys)
+    n_levels = 2 if any(isinstance(value, dict) for value in rpeaks.values()) else 1
+    if index_names is None:
+        index_names = [None] * n_levels
+    if len(index_names) != n_levels:
+        raise ValueError(
+            "Number of 'index_names' ({}) does not match the number of dictionary levels of 'rpeaks' ({})!".format(
+                len(index_names), n_levels
+            )
+        )
+    if n_levels == 2:
+        return pd.MultiIndex.from_tuples(keys, names=index_names)
+    return pd.Index([key[0] for key in keys], name=index_names[0])
+
+
+def _rpeak_dict_to_flat(rpeak_dict: Dict[Tuple, RPeakDataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+    peak_list = [data["R_Peak_Idx"].dropna().to_numpy(dtype=float) for data in rpeak_dict.values()]
+    peaks = np.concatenate(peak_list) if len(peak_list) > 0 else np.empty(0)
+    group = np.repeat(np.arange(len(peak_list)), [len(p) for p in peak_list])
+    return peaks, group
+
+
+def _count_artifacts(artifacts: np.ndarray, group: np.ndarray, n_series: int) -> np.ndarray:
+    counts = np.zeros((n_series, len(RR_ARTIFACT_TYPES)), dtype=int)
+    np.add.at(counts, (group[artifacts > 0], artifacts[artifacts > 0] - 1), 1)
+    return counts
+
+
+def _local_index(group: np.ndarray, n_series: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the index of each beat within its series and the length of its series."""
+    lengths = np.bincount(group, minlength=n_series)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.arange(len(group)) - starts[group], lengths[group]
+
+
+def _group_mean(values: np.ndarray, mask: np.ndarray, group: np.ndarray, n_series: int) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.bincount(group[mask], weights=values[mask], minlength=n_series) / np.bincount(
+            group[mask], minlength=n_series
+        )
+
+
+def _neighbor_index(local: np.ndarray, length: np.ndarray, offset: int) -> np.ndarray:
+    """Return the global index of the neighboring beat with the given offset (reflected at the series boundaries)."""
+    idx = np.abs(local + offset)
+    idx = np.where(idx > length - 1, 2 * (length - 1) - idx, idx)
+    return np.arange(len(local)) - local + np.clip(idx, 0, length - 1)
+
+
+def _shift(values: np.ndarray, periods: int, fill=np.nan) -> np.ndarray:
+    result = np.full(len(values), fill, dtype=values.dtype if fill is not np.nan else float)
+    if periods > 0:
+        result[periods:] = values[:-periods]
+    else:
+        result[:periods] = values[-periods:]
+    return result
@@ -0,0 +1,273 @@
+"""Method(s) for computing saliva features of all subjects at once."""
+import itertools
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from biopsykit.utils.datatype_helper import SalivaRawDataFrame
+
+__all__ = ["SALIVA_WINDOW_FEATURES", "saliva_features", "saliva_samples_to_array", "saliva_window_features"]
+
+SALIVA_WINDOW_FEATURES = ["auc_g", "auc_i", "max_inc", "max_inc_percent", "slope"]
+"""Features computed for each window of saliva samples."""
+
+window_t = Union[Dict[str, Tuple[str, str]], Sequence[Tuple[str, str]]]  # pylint:disable=invalid-name
+
+
+def saliva_samples_to_array(
+    data: SalivaRawDataFrame, saliva_type: Optional[str] = "cortisol"
+) -> Tuple[np.ndarray, pd.Index, pd.Index]:
+    """Pivot saliva data into a (subject x sample) array.
+
+    Parameters
+    ----------
+    data : :obj:`~biopsykit.utils.datatype_helper.SalivaRawDataFrame`
+        saliva data in long-format with a ``sample`` index level
+    saliva_type : str, optional
+        saliva type to pivot. Default: "cortisol"
+
+    Returns
+    -------
+    values : :class:`~numpy.ndarray`
+        array with saliva values of shape (subject x sample). Missing samples are NaN.
+    index : :class:`~pandas.Index`
+        index of the subjects (i.e., all index levels of ``data`` except ``sample``)
+    samples : :class:`~pandas.Index`
+        sample labels in the order they occur in the data of the subject with the most samples. Samples that are
+        absent for some subjects are NaN for these subjects.
+
+    """
+    samples = _sample_order(data.index)
+    data = data[saliva_type].unstack(level="sample").reindex(columns=samples)
+    return data.to_numpy(dtype=float), data.index, samples
+
+
+def saliva_window_features(
+    data: SalivaRawDataFrame,
+    sample_times: Sequence[float],
+    windows: Optional[window_t] = None,
+    saliva_type: Optional[str] = "cortisol",
+) -> pd.DataFrame:
+    """Compute saliva features of all subjects for multiple windows of saliva samples at once.
+
+    A window is defined by its first and its last saliva sample. For each window, the following features are
+    computed (see :obj:`~cft_analysis.feature_extraction.saliva.SALIVA_WINDOW_FEATURES`):
+
+    * ``auc_g``: area under the curve with respect to ground (Pruessner et al., 2003)
+    * ``auc_i``: area under the curve with respect to increase, i.e., with respect to the first sample of the window
+    * ``max_inc``: maximum increase between the first sample and all subsequent samples of the window
+    * ``max_inc_percent``: maximum increase relative to the first sample (in percent)
+    * ``slope``: slope between the first and the last sample of the window
+
+    For a window containing all samples, these features are equivalent to the features computed by
+    :func:`biopsykit.saliva.auc`, :func:`biopsykit.saliva.max_increase`, and :func:`biopsykit.saliva.slope`.
+    All windows are computed from one cumulative integral of the (subject x sample) array, so the cost of
+    sweeping many windows is negligible.
+
+    Missing samples are handled as follows: Missing samples *within* a window are linearly interpolated from the
+    neighboring samples (i.e., the trapezoids are computed over the available samples) and ignored for computing the
+    maximum increase. If the first or the last sample of a window is missing, all features of this window are NaN.
+
+    Parameters
+    ----------
+    data : :obj:`~biopsykit.utils.datatype_helper.SalivaRawDataFrame`
+        saliva data in long-format with a ``sample`` index level
+    sample_times : list of float
+        saliva sampling times (in minutes) of all samples in ``data``
+    windows : dict or list of tuple, optional
+        windows to compute features for. Either a dictionary with window names as keys and (first, last) sample
+        label tuples as values, or a list of (first, last) sample label tuples (the window names are then the
+        concatenated sample labels, e.g., "S1S6"), or ``None`` to compute features for all possible windows.
+        Default: ``None``
+    saliva_type : str, optional
+        saliva type to compute features on. Default: "cortisol"
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        dataframe with saliva features in long-format with the additional index levels ``window`` and
+        ``saliva_feature``
+
+    Raises
+    ------
+    ValueError
+        if the number of ``sample_times`` does not match the number of samples, if ``sample_times`` are not
+        increasing, or if a window is invalid
+
+    References
+    ----------
+    Pruessner, J. C., Kirschbaum, C., Meinlschmid, G., & Hellhammer, D. H. (2003).
+    Two formulas for computation of the area under the curve represent measures of total hormone concentration
+    versus time-dependent change. Psychoneuroendocrinology, 28(7), 916–931.
+    https://doi.org/10.1016/S0306-4530(02)00108-7
+
+    """
+    values, index, samples = saliva_samples_to_array(data, saliva_type)
+    sample_times = np.asarray(sample_times, dtype=float)
+    if len(sample_times) != len(samples):
+        raise ValueError(
+            "Number of 'sample_times' ({}) does not match number of samples ({})!".format(
+                len(sample_times), len(samples)
+            )
+        )
+    if np.any(np.diff(sample_times) <= 0):
+        raise ValueError("'sample_times' must be increasing!")
+
+    window_names, idx_start, idx_end = _sanitize_windows(windows, samples)
+    features = _compute_window_features(values, sample_times, idx_start, idx_end)
+
+    # features has shape (subject x window x feature) => convert into long-format
+    n_windows, n_features = features.shape[1:]
+    index_long = index.to_frame(index=False)
+    index_long = index_long.iloc[np.repeat(np.arange(len(index)), n_windows * n_features)].reset_index(drop=True)
+    index_long["window"] = np.tile(np.repeat(window_names, n_features), len(index))
+    index_long["saliva_feature"] = np.tile(SALIVA_WINDOW_FEATURES, len(index) * n_windows)
+    index_long = pd.MultiIndex.from_frame(index_long)
+    return pd.DataFrame(features.ravel(), index=index_long, columns=[saliva_type])
+
+
+def saliva_features(
+    data: SalivaRawDataFrame,
+    sample_times: Sequence[float],
+    saliva_type: Optional[str] = "cortisol",
+    remove_s0: Optional[bool] = True,
+    slope_samples: Optional[Tuple[str, str]] = ("S1", "S4"),
+) -> pd.DataFrame:
+    """Compute the standard set of saliva features of all subjects at once.
+
+    This function computes the same features (and returns them in the same format) as the saliva processing
+    notebook, i.e., ``auc_g``, ``auc_i``, ``auc_i_post``, ``max_inc``, ``max_inc_percent``, and the slope between
+    ``slope_samples``, but computes the features of all subjects in one vectorized pass using
+    :func:`~cft_analysis.feature_extraction.saliva.saliva_window_features`.
+
+    Parameters
+    ----------
+    data : :obj:`~biopsykit.utils.datatype_helper.SalivaRawDataFrame`
+        saliva data in long-format with a ``sample`` index level
+    sample_times : list of float
+        saliva sampling times (in minutes) of all samples in ``data`` (including the first sample)
+    saliva_type : str, optional
+        saliva type to compute features on. Default: "cortisol"
+    remove_s0 : bool, optional
+        ``True`` to exclude the first saliva sample from computing features, ``False`` otherwise. Default: ``True``
+    slope_samples : tuple of str, optional
+        pair of saliva sample labels to compute the slope between. Default: ("S1", "S4")
+
+    Returns
+    -------
+    :class:`~pandas.DataFrame`
+        dataframe with saliva features in long-format
+
+    """
+    samples = _sample_order(data.index)
+    sample_times = np.asarray(sample_times, dtype=float)
+    if remove_s0:
+        data = data.drop(samples[0], level="sample")
+        samples = samples[1:]
+        sample_times = sample_times[1:]
+
+    # AUC_I "post" only considers samples collected after the stressor, i.e., with sample times >= 0
+    first_post = samples[np.argmax(sample_times >= 0)]
+    windows = {
+        "total": (samples[0], samples[-1]),
+        "post": (first_post, samples[-1]),
+        "slope": tuple(slope_samples),
+    }
+    features = saliva_window_features(data, sample_times, windows=windows, saliva_type=saliva_type)
+    features = features[saliva_type].unstack(["window", "saliva_feature"])
+
+    out = pd.DataFrame(
+        {
+            "auc_g": features[("total", "auc_g")],
+            "auc_i": features[("total", "auc_i")],
+            "auc_i_post": features[("post", "auc_i")],
+            "max_inc": features[("total", "max_inc")],
+            "max_inc_percent": features[("total", "max_inc_percent")],
+            "slope{}{}".format(*slope_samples): features[("slope", "slope")],
+        }
+    )
+    out.columns.name = "saliva_feature"
+    out = pd.DataFrame(out.stack(), columns=[saliva_type])
+    return out.sort_index()
+
+
+def _sample_order(index: pd.MultiIndex) -> pd.Index:
+    """Return the sample labels in the order of the subject with the most samples.
+
+    The order of first occurrence in the complete data is not sufficient since it is wrong if a sample is absent for
+    the first subject(s).
+    """
+    samples = index.get_level_values("sample")
+    subjects = index.droplevel("sample")
+    if len(samples) == 0:
+        return samples.unique()
+    subject_codes, _ = pd.factorize(subjects)
+    subject_max = np.argmax(np.bincount(subject_codes))
+    order = samples[subject_codes == subject_max].unique()
+    return order.append(samples.unique().difference(order, sort=False))
+
+
+def _sanitize_windows(windows: Optional[window_t], samples: pd.Index) -> Tuple[Sequence[str], np.ndarray, np.ndarray]:
+    if windows is None:
+        windows = list(itertools.combinations(samples, 2))
+    if not isinstance(windows, dict):
+        windows = {"{}{}".format(*window): window for window in windows}
+
+    try:
+        idx_start, idx_end = np.array([[samples.get_loc(s) for s in window] for window in windows.values()]).T
+    except KeyError as e:
+        raise ValueError("Invalid sample label in 'windows': {}".format(e)) from e
+    if np.any(idx_end <= idx_start):
+        raise ValueError("The first sample of each window must be collected before its last sample!")
+    return list(windows.keys()), idx_start, idx_end
+
+
+def _compute_window_features(
+    values: np.ndarray, sample_times: np.ndarray, idx_start: np.ndarray, idx_end: np.ndarray
+) -> np.ndarray:
+    """Compute the features of all windows, returns an array of shape (subject x window x feature)."""
+    values_interp = _interpolate_missing_samples(values, sample_times)
+
+    # cumulative trapezoidal integral, so the AUC of each window is the difference between its first and last sample
+    trapezoids = np.diff(sample_times) * (values_interp[:, 1:] + values_interp[:, :-1]) / 2
+    integral = np.concatenate([np.zeros((len(values), 1)), np.nancumsum(trapezoids, axis=1)], axis=1)
+
+    # running maximum of all samples after each sample: max_after[:, i, j] = max(values[:, i+1:j+1])
+    n_samples = values.shape[1]
+    max_after = np.full((len(values), n_samples, n_samples), np.nan)
+    for i in range(n_samples - 1):
+        max_after[:, i, i + 1 :] = np.fmax.accumulate(values[:, i + 1 :], axis=1)
+
+    value_start = values[:, idx_start]
+    value_end = values[:, idx_end]
+    duration = sample_times[idx_end] - sample_times[idx_start]
+
+    auc_g = integral[:, idx_end] - integral[:, idx_start]
+    auc_i = auc_g - value_start * duration
+    max_inc = max_after[:, idx_start, idx_end] - value_start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        max_inc_percent = 100.0 * max_inc / np.abs(value_start)
+    slope = (value_end - value_start) / duration
+
+    features = np.stack([auc_g, auc_i, max_inc, max_inc_percent, slope], axis=-1)
+    # windows with missing first or last sample are not defined
+    features[np.isnan(value_start) | np.isnan(value_end)] = np.nan
+    return features
+
+
+def _interpolate_missing_samples(values: np.ndarray, sample_times: np.ndarray) -> np.ndarray:
+    """Linearly interpolate missing samples between two available samples (no extrapolation)."""
+    n_samples = values.shape[1]
+    available = ~np.isnan(values)
+    idx = np.arange(n_samples)
+    idx_prev = np.maximum.accumulate(np.where(available, idx, -1), axis=1)
+    idx_next = np.minimum.accumulate(np.where(available, idx, n_samples)[:, ::-1], axis=1)[:, ::-1]
+    mask_interp = ~available & (idx_prev >= 0) & (idx_next < n_samples)
+
+    idx_prev = np.clip(idx_prev, 0, n_samples - 1)
+    idx_next = np.clip(idx_next, 0, n_samples - 1)
+    value_prev = np.take_along_axis(values, idx_prev, axis=1)
+    value_next = np.take_along_axis(values, idx_next, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = (sample_times[idx] - sample_times[idx_prev]) / (sample_times[idx_next] - sample_times[idx_prev])
+    return np.where(mask_interp, value_prev + weight * (value_next - value_prev), values)
@@ -0,0 +1,418 @@
+"""Sharded pipeline for ECG processing and feature computation of the CFT dataset.
+
+The pipeline is split into three steps that can be run independently (e.g., as separate jobs on a compute cluster):
+
+* :func:`process_ecg`: Process raw ECG data and export heart rate, R-peak, and continuous HRV data per subject.
+* :func:`compute_features`: Compute HR, HRV, and CFT features as well as heart rate ensemble data of one shard.
+* :func:`merge_features`: Merge the outputs of all shards into ``cft_hr_features_merged.csv``,
+  ``cft_parameter.csv``, and ``cft_hr_ensemble.npy``.
+
+Subjects are partitioned into shards deterministically by :func:`shard_subjects`, so each shard can be processed on
+a different machine without coordination.
+"""
+import json
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import biopsykit as bp
+import numpy as np
+import pandas as pd
+from biopsykit.protocols import MIST
+from neurokit2 import NeuroKitWarning
+from tqdm.auto import tqdm
+
+from cft_analysis._types import path_t
+from cft_analysis.datasets import CftDatasetRaw
+from cft_analysis.datasets.helper import load_subject_continuous_hrv_data, load_subject_data_dicts
+from cft_analysis.feature_extraction.cft import cft_parameter_per_phase
+from cft_analysis.feature_extraction.hr_ensemble import compute_hr_ensemble, merge_hr_ensembles, write_hr_ensemble
+from cft_analysis.feature_extraction.hrv import hrv_continuous_dict
+from cft_analysis.utils.data_reshaping import (
+    reshape_cft_params,
+    reshape_hr_data,
+    reshape_hrv_data,
+    reshape_time_above_bl_glo,
+)
+
+__all__ = [
+    "compute_features",
+    "merge_features",
+    "parse_shard",
+    "process_ecg",
+    "shard_subjects",
+    "CFT_SUBPHASES",
+    "CFT_STRUCTURE",
+    "HRV_COLUMNS",
+]
+
+CFT_SUBPHASES = {"BL": 60, "RP_CFI": 120, "AT": 240, "FB": 0}
+"""Subphases of each MIST phase (with durations in seconds)."""
+
+CFT_STRUCTURE = {
+    "Pre": None,
+    "MIST": {"MIST1": CFT_SUBPHASES, "MIST2": CFT_SUBPHASES, "MIST3": CFT_SUBPHASES},
+    "Post": None,
+}
+"""Structure of the study protocol."""
+
+HRV_COLUMNS = ["HRV_SDNN", "HRV_RMSSD", "HRV_pNN50", "HRV_pNN20"]
+"""HRV parameters of interest."""
+
+_MIST_PHASES = ["MIST1", "MIST2", "MIST3"]
+_SHARD_FOLDER = "shards"
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard specification of the form ``i/N``.
+
+    Parameters
+    ----------
+    shard : str
+        shard specification, where ``i`` is the (zero-based) index of the shard and ``N`` is the number of shards
+
+    Returns
+    -------
+    shard_index : int
+        index of the shard
+    n_shards : int
+        number of shards
+
+    Raises
+    ------
+    ValueError
+        if ``shard`` is not a valid shard specification
+
+    """
+    try:
+        shard_index, n_shards = (int(s) for s in shard.split("/"))
+    except ValueError as e:
+        raise ValueError("Invalid shard '{}'! Expected a shard of the form 'i/N', e.g., '0/4'.".format(shard)) from e
+    _assert_valid_shard(shard_index, n_shards)
+    return shard_index, n_shards
+
+
+def shard_subjects(subjects: Sequence[str], shard_index: int, n_shards: int) -> Sequence[str]:
+    """Return the subjects belonging to one shard.
+
+    Subjects are sorted and assigned to the shards in a round-robin fashion, so the partitioning only depends on the
+    set of subjects, not on their order, and the number of subjects per shard differs by at most one.
+
+    Parameters
+    ----------
+    subjects : list of str
+        list of all subject IDs
+    shard_index : int
+        (zero-based) index of the shard
+    n_shards : int
+        number of shards
+
+    Returns
+    -------
+    list of str
+        list of subject IDs belonging to the shard
+
+    """
+    _assert_valid_shard(shard_index, n_shards)
+    return sorted(set(subjects))[shard_index::n_shards]
+
+
+def process_ecg(
+    base_path: path_t,
+    shard_index: Optional[int] = 0,
+    n_shards: Optional[int] = 1,
+    overwrite: Optional[bool] = False,
+) -> Sequence[str]:
+    """Process raw ECG data of all subjects in one shard.
+
+    For each subject, heart rate, R-peak, and continuous HRV data are exported into the ``processed`` folder of the
+    subject (see :meth:`~cft_analysis.datasets.CftDatasetRaw.setup_export_paths`).
+
+    Parameters
+    ----------
+    base_path : :class:`~pathlib.Path` or str
+        base path to the (raw) CFT dataset
+    shard_index : int, optional
+        (zero-based) index of the shard to process. Default: 0
+    n_shards : int, optional
+        number of shards. Default: 1
+    overwrite : bool, optional
+        ``True`` to re-process subjects with already existing processing results, ``False`` to skip them.
+        Default: ``False``
+
+    Returns
+    -------
+    list of str
+        list of subject IDs that were processed
+
+    """
+    dataset = CftDatasetRaw(Path(base_path))
+    subjects = shard_subjects(_get_subjects(dataset), shard_index, n_shards)
+
+    processed_subjects = []
+    for subject_id in tqdm(subjects, desc="ECG Processing"):
+        subset = dataset.get_subset(subject=subject_id)
+        export_paths = subset.setup_export_paths()
+        if not overwrite and export_paths["hr_result"].exists():
+            continue
+
+        ep = bp.signals.ecg.EcgProcessor(data=subset.ecg, sampling_rate=subset.sampling_rate)
+        ep.ecg_process(title=subject_id)
+        dict_hrv_continuous = hrv_continuous_dict(ep)
+
+        # save HR data, R-Peak data, and continuous HRV data to file
+        bp.io.ecg.write_hr_phase_dict(ep.heart_rate, export_paths["hr_result"])
+        bp.io.write_pandas_dict_excel(ep.rpeaks, export_paths["rpeaks_result"])
+        bp.io.write_pandas_dict_excel(dict_hrv_continuous, export_paths["hrv_cont"])
+        processed_subjects.append(subject_id)
+
+    return processed_subjects
+
+
+def compute_features(
+    base_path: path_t,
+    output_path: path_t,
+    shard_index: Optional[int] = 0,
+    n_shards: Optional[int] = 1,
+) -> Path:
+    """Compute HR, HRV, and CFT features as well as heart rate ensemble data of all subjects in one shard.
+
+    The results are exported into the folder ``<output_path>/ecg/shards/shard_<i>_of_<N>``, together with a
+    manifest file listing the subjects of the shard. Use :func:`merge_features` to combine the results of all shards.
+
+    Parameters
+    ----------
+    base_path : :class:`~pathlib.Path` or str
+        base path to the (raw) CFT dataset. ECG data of all subjects in the shard are expected to be already
+        processed by :func:`process_ecg`
+    output_path : :class:`~pathlib.Path` or str
+        base path to export results to
+    shard_index : int, optional
+        (zero-based) index of the shard to process. Default: 0
+    n_shards : int, optional
+        number of shards. Default: 1
+
+    Returns
+    -------
+    :class:`~pathlib.Path`
+        path to the folder with the results of this shard
+
+    """
+    dataset = CftDatasetRaw(Path(base_path))
+    all_subjects = sorted(set(_get_subjects(dataset)))
+    subjects = shard_subjects(all_subjects, shard_index, n_shards)
+
+    shard_path = _shard_path(output_path, shard_index, n_shards)
+    bp.utils.file_handling.mkdirs(shard_path)
+
+    manifest = {"shard_index": shard_index, "n_shards": n_shards, "subjects": subjects, "all_subjects": all_subjects}
+    if len(subjects) > 0:
+        dataset = dataset.get_subset(subject=subjects)
+        data_concat, cft_params, (hr_ensemble, hr_ensemble_metadata) = _compute_features_subjects(dataset, subjects)
+        data_concat.to_csv(shard_path.joinpath("cft_hr_features.csv"))
+        if cft_params is not None:
+            cft_params.to_csv(shard_path.joinpath("cft_parameter.csv"))
+        write_hr_ensemble(hr_ensemble, hr_ensemble_metadata, shard_path.joinpath("cft_hr_ensemble.npy"))
+
+    # the manifest is written last so that it marks the shard as complete
+    with shard_path.joinpath("manifest.json").open("w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=4)
+    return shard_path
+
+
+def merge_features(output_path: path_t) -> Dict[str, Path]:
+    """Merge the results of all shards computed by :func:`compute_features`.
+
+    Parameters
+    ----------
+    output_path : :class:`~pathlib.Path` or str
+        base path the results of all shards were exported to
+
+    Returns
+    -------
+    dict
+        dictionary with paths to the merged files:
+        * "features": merged HR, HRV, and CFT features (``cft_hr_features_merged.csv``)
+        * "cft_parameter": CFT parameter (``cft_parameter.csv``)
+        * "hr_ensemble": heart rate ensemble data (``cft_hr_ensemble.npy``)
+
+    Raises
+    ------
+    ValueError
+        if no shard results are found, if shards are missing, if no shard contains any subjects, or if subjects are
+        missing or contained in more than one shard
+
+    """
+    # ensure pathlib
+    export_path = Path(output_path).joinpath("ecg")
+    manifests = _load_shard_manifests(export_path.joinpath(_SHARD_FOLDER))
+    _check_shard_manifests(manifests)
+
+    features_list = []
+    cft_params_list = []
+    ensemble_list = []
+    for manifest in manifests:
+        if len(manifest["subjects"]) == 0:
+            continue
+        shard_path = _shard_path(output_path, manifest["shard_index"], manifest["n_shards"])
+        features_list.append(bp.io.load_long_format_csv(shard_path.joinpath("cft_hr_features.csv")))
+        if shard_path.joinpath("cft_parameter.csv").exists():
+            cft_params_list.append(
+                pd.read_csv(shard_path.joinpath("cft_parameter.csv"), index_col=["subject", "phase"])
+            )
+        ensemble_list.append(_load_hr_ensemble_array(shard_path.joinpath("cft_hr_ensemble.npy")))
+
+    if len(features_list) == 0:
+        raise ValueError("None of the shards contains any subjects!")
+
+    export_paths = {
+        "features": export_path.joinpath("cft_hr_features_merged.csv"),
+        "cft_parameter": export_path.joinpath("cft_parameter.csv"),
+        "hr_ensemble": export_path.joinpath("cft_hr_ensemble.npy"),
+    }
+
+    pd.concat(features_list).sort_index().to_csv(export_paths["features"])
+    if len(cft_params_list) > 0:
+        pd.concat(cft_params_list).sort_index().to_csv(export_paths["cft_parameter"])
+
+    hr_ensemble, hr_ensemble_metadata = merge_hr_ensembles(ensemble_list)
+    # order subjects the same way as when computing the ensemble data of all subjects at once
+    subject_order = np.argsort(hr_ensemble_metadata["subjects"], kind="stable")
+    hr_ensemble_metadata["subjects"] = [hr_ensemble_metadata["subjects"][i] for i in subject_order]
+    write_hr_ensemble(hr_ensemble[..., subject_order], hr_ensemble_metadata, export_paths["hr_ensemble"])
+
+    return export_paths
+
+
+def _compute_features_subjects(
+    dataset: CftDatasetRaw, subjects: Sequence[str]
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], Tuple[np.ndarray, Dict[str, Any]]]:
+    hr_subject_data_dict, rpeaks_subject_data_dict = load_subject_data_dicts(dataset, subject_ids=subjects)
+    hrv_subject_data_dict = load_subject_continuous_hrv_data(dataset, subject_ids=subjects)
+    condition_list = dataset.condition_list
+
+    mist = MIST(name="CFT", structure=CFT_STRUCTURE)
+    mist.add_hr_data(hr_data=hr_subject_data_dict, rpeak_data=rpeaks_subject_data_dict)
+
+    hr_ensemble = compute_hr_ensemble(hr_subject_data_dict, select_phases=_MIST_PHASES, normalize_to="Pre")
+
+    params = {"select_phases": _MIST_PHASES, "split_into_subphases": CFT_SUBPHASES, "add_conditions": condition_list}
+    mist.compute_hr_results(
+        "hr_mean",
+        resample_sec=False,
+        normalize_to=False,
+        select_phases=True,
+        split_into_subphases=True,
+        add_conditions=True,
+        params=params,
+    )
+    mist.compute_hr_results(
+        "hr_mean_normalized",
+        resample_sec=False,
+        normalize_to=True,
+        select_phases=True,
+        split_into_subphases=True,
+        add_conditions=True,
+        params={"normalize_to": "Pre", **params},
+    )
+    mist.compute_hr_above_baseline(
+        "hr_above_bl_glo", "Pre", select_phases=True, split_into_subphases=True, add_conditions=True, params=params
+    )
+
+    # ignore neurokit warnings
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=NeuroKitWarning)
+        mist.compute_hrv_results(
+            "hrv_phases",
+            add_conditions=True,
+            params={"add_conditions": condition_list},
+            hrv_params={"hrv_types": ["hrv_time", "hrv_nonlinear"]},
+        )
+        mist.compute_hrv_results(
+            "hrv_subphases",
+            split_into_subphases=True,
+            select_phases=True,
+            add_conditions=True,
+            params=params,
+            hrv_params={"hrv_types": ["hrv_time", "hrv_nonlinear"]},
+        )
+        mist.compute_hrv_above_baseline(
+            "hrv_above_bl_glo",
+            "Pre",
+            hrv_subject_data_dict,
+            select_phases=True,
+            split_into_subphases=True,
+            add_conditions=True,
+            hrv_columns=HRV_COLUMNS,
+            params=params,
+        )
+
+    concat_dict = {
+        "HR": reshape_hr_data(mist),
+        "Time_BL_Glo": reshape_time_above_bl_glo(mist),
+        "HRV": reshape_hrv_data(mist, HRV_COLUMNS),
+    }
+
+    # shards without subjects of the CFT condition do not have CFT parameter
+    cft_params = None
+    cft_subject_list = condition_list[condition_list["condition"] == "CFT"]
+    if len(cft_subject_list) > 0:
+        cft_params = cft_parameter_per_phase(hr_subject_data_dict, cft_subject_list)
+        concat_dict["CFT"] = reshape_cft_params(cft_params, condition_list)
+
+    data_concat = pd.concat(concat_dict, names=["category"])
+    data_concat = data_concat.reorder_levels(["condition", "subject", "phase", "subphase", "category", "type"])
+    return data_concat.sort_index(), cft_params, hr_ensemble
+
+
+def _get_subjects(dataset: CftDatasetRaw) -> Sequence[str]:
+    """Return all subjects of the dataset that have ECG data."""
+    subject_dirs = [subject_dir.name for subject_dir in dataset.subject_dirs]
+    return [subject for subject in dataset.index["subject"].unique() if subject in subject_dirs]
+
+
+def _shard_path(output_path: path_t, shard_index: int, n_shards: int) -> Path:
+    return Path(output_path).joinpath("ecg", _SHARD_FOLDER, "shard_{}_of_{}".format(shard_index, n_shards))
+
+
+def _load_shard_manifests(shard_folder: Path) -> Sequence[Dict[str, Any]]:
+    manifests = []
+    for manifest_path in sorted(shard_folder.glob("shard_*_of_*/manifest.json")):
+        with manifest_path.open(encoding="utf-8") as fp:
+            manifests.append(json.load(fp))
+    if len(manifests) == 0:
+        raise ValueError("No shard results found in '{}'!".format(shard_folder))
+    return sorted(manifests, key=lambda m: m["shard_index"])
+
+
+def _check_shard_manifests(manifests: Sequence[Dict[str, Any]]):
+    n_shards = {manifest["n_shards"] for manifest in manifests}
+    if len(n_shards) != 1:
+        raise ValueError("Shard results with different numbers of shards found: {}!".format(sorted(n_shards)))
+    n_shards = n_shards.pop()
+
+    shard_indices = [manifest["shard_index"] for manifest in manifests]
+    missing_shards = sorted(set(range(n_shards)) - set(shard_indices))
+    if len(missing_shards) > 0:
+        raise ValueError("Missing results of shard(s) {} (of {} shards)!".format(missing_shards, n_shards))
+
+    subjects = pd.Series([subject for manifest in manifests for subject in manifest["subjects"]], dtype=object)
+    duplicated_subjects = sorted(subjects[subjects.duplicated()].unique())
+    if len(duplicated_subjects) > 0:
+        raise ValueError("Subject(s) {} contained in more than one shard!".format(duplicated_subjects))
+
+    all_subjects = {subject for manifest in manifests for subject in manifest["all_subjects"]}
+    missing_subjects = sorted(all_subjects - set(subjects))
+    if len(missing_subjects) > 0:
+        raise ValueError("Subject(s) {} missing in shard results!".format(missing_subjects))
+
+
+def _load_hr_ensemble_array(file_path: Path) -> Tuple[np.ndarray, Dict[str, Any]]:
+    with file_path.with_suffix(".json").open(encoding="utf-8") as fp:
+        metadata = json.load(fp)
+    return np.load(file_path), metadata
+
+
+def _assert_valid_shard(shard_index: int, n_shards: int):
+    if n_shards < 1 or not 0 <= shard_index < n_shards:
+        raise ValueError("Invalid shard {}/{}! Expected 'N' >= 1 and 0 <= 'i' < 'N'.".format(shard_index, n_shards))
@@ -0,0 +1,54 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+EXPERIMENT_DATA_PATH = Path(__file__).parents[1].joinpath("experiments/2022_scientific_reports/data")
+
+
+@pytest.fixture()
+def processed_data_path(tmp_path) -> Path:
+    """Copy of the processed data of the 2022 Scientific Reports experiment (which can safely be modified)."""
+    data_path = tmp_path.joinpath("data")
+    shutil.copytree(EXPERIMENT_DATA_PATH, data_path)
+    return data_path
+
+
+def _make_rpeaks(n_beats: int, sampling_rate: float = 256.0, seed: int = 0, datetime_index: bool = True):
+    """Create synthetic R-peak data (in the format of an ``RPeakDataFrame``) with a slowly varying heart rate."""
+    rng = np.random.default_rng(seed)
+    rr = 0.85 + 0.05 * np.sin(np.arange(n_beats) / 7) + rng.normal(0, 0.02, n_beats)
+    rpeak_idx = np.round(np.cumsum(rr) * sampling_rate)
+    rr_interval = np.ediff1d(rpeak_idx, to_end=0) / sampling_rate
+    if n_beats > 0:
+        rr_interval[-1] = np.mean(rr_interval[:-1]) if n_beats > 1 else 0
+    if datetime_index:
+        index = pd.Timestamp("2021-06-01 10:00", tz="Europe/Berlin") + pd.to_timedelta(
+            rpeak_idx / sampling_rate, unit="s"
+        )
+        index = pd.DatetimeIndex(index, name="time")
+    else:
+        index = pd.Index(rpeak_idx / sampling_rate, name="time")
+    return pd.DataFrame(
+        {
+            "R_Peak_Quality": 1.0,
+            "R_Peak_Idx": rpeak_idx,
+            "RR_Interval": rr_interval,
+            "R_Peak_Outlier": 0,
+            "Heart_Rate": 60 / rr_interval,
+        },
+        index=index,
+    )
+
+
+@pytest.fixture()
+def make_rpeaks():
+    """Factory fixture to create synthetic R-peak data."""
+    return _make_rpeaks
+
+
+@pytest.fixture()
+def rpeaks() -> pd.DataFrame:
+    return _make_rpeaks(300)
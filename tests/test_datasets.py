@@ -0,0 +1,219 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from biopsykit.io import load_codebook, load_long_format_csv
+from biopsykit.utils.dataframe_handling import apply_codebook
+from pandas.testing import assert_frame_equal
+
+from cft_analysis.datasets import CftDatasetProcessed, CftDatasetProcessedMultiStudy, helper
+from cft_analysis.datasets.helper import (
+    apply_codebook_compiled,
+    compile_codebook,
+    load_dataset_index_cached,
+    load_long_format_csv_partitioned,
+)
+
+INDEX_COLS = ["condition", "subject", "phase", "subphase"]
+
+
+@pytest.mark.parametrize("chunksize", [100, 100000])
+def test_load_long_format_csv_partitioned(processed_data_path, chunksize):
+    file_path = processed_data_path.joinpath(CftDatasetProcessed.cft_hr_features_filename)
+    filter_dict = {"category": ["HR", "HRV"], "subject": ["Vp01", "Vp05", "Vp12"]}
+
+    reference = load_long_format_csv(file_path)
+    index = reference.index
+    mask = index.get_level_values("category").isin(filter_dict["category"])
+    mask &= index.get_level_values("subject").isin(filter_dict["subject"])
+    data = load_long_format_csv_partitioned(file_path, filter_dict=filter_dict, chunksize=chunksize)
+    assert_frame_equal(data, reference.loc[mask])
+
+
+@pytest.mark.parametrize("data_type", ["heart_rate", "hrv", "questionnaire", "cortisol", "cortisol_features"])
+def test_multi_study_equals_single_studies(processed_data_path, data_type):
+    dataset = CftDatasetProcessedMultiStudy({"study_a": processed_data_path, "study_b": processed_data_path})
+    dataset = dataset.get_subset(condition="CFT")
+    reference = getattr(CftDatasetProcessed(processed_data_path).get_subset(condition="CFT"), data_type)
+
+    data = getattr(dataset, data_type)
+    assert_frame_equal(data, pd.concat({"study_a": reference, "study_b": reference}, names=["study"]))
+
+
+def test_multi_study_subset_per_study(processed_data_path):
+    dataset = CftDatasetProcessedMultiStudy({"study_a": processed_data_path, "study_b": processed_data_path})
+    dataset = dataset.get_subset(index=dataset.index[(dataset.index["study"] == "study_a")])
+
+    data = dataset.heart_rate
+    assert list(data.index.get_level_values("study").unique()) == ["study_a"]
+    assert_frame_equal(data.xs("study_a", level="study"), CftDatasetProcessed(processed_data_path).heart_rate)
+
+
+def test_multi_study_missing_data(processed_data_path):
+    processed_data_path.joinpath(CftDatasetProcessed.saliva_features_filename.format("cortisol")).unlink()
+    dataset = CftDatasetProcessedMultiStudy({"study_a": processed_data_path, "study_b": processed_data_path})
+
+    with pytest.raises(FileNotFoundError, match="Study 'study_a' does not contain cortisol_features data"):
+        _ = dataset.cortisol_features
+    # other data types are not affected
+    assert set(dataset.cortisol.index.get_level_values("study")) == {"study_a", "study_b"}
+
+
+def test_multi_study_skips_missing_data(processed_data_path):
+    study_b_path = processed_data_path.parent.joinpath("study_b")
+    shutil.copytree(processed_data_path, study_b_path)
+    study_b_path.joinpath(CftDatasetProcessed.saliva_features_filename.format("cortisol")).unlink()
+    dataset = CftDatasetProcessedMultiStudy(
+        {"study_a": processed_data_path, "study_b": study_b_path}, skip_missing=True
+    )
+
+    with pytest.warns(UserWarning, match="Study 'study_b' does not contain cortisol_features data"):
+        data = dataset.cortisol_features
+    assert set(data.index.get_level_values("study")) == {"study_a"}
+
+    dataset = CftDatasetProcessedMultiStudy({"study_b": study_b_path}, skip_missing=True)
+    with pytest.warns(UserWarning, match="does not contain cortisol_features data"):
+        with pytest.raises(ValueError, match="None of the selected studies"):
+            _ = dataset.cortisol_features
+
+
+def test_multi_study_invalid_data_type(processed_data_path):
+    dataset = CftDatasetProcessedMultiStudy({"study_a": processed_data_path})
+    with pytest.raises(ValueError, match="Invalid 'data_type'"):
+        list(dataset.iter_data("sample_times"))
+
+
+def test_get_data_files(processed_data_path):
+    dataset = CftDatasetProcessed(processed_data_path)
+    for data_type in ["heart_rate", "heart_rate_ensemble", "questionnaire_recoded", "cortisol", "cortisol_features"]:
+        data_files = dataset.get_data_files(data_type)
+        assert len(data_files) > 0
+        assert all(path.exists() for path in data_files)
+    assert dataset.get_data_files("cortisol") == [processed_data_path.joinpath("saliva/cortisol_samples.csv")]
+
+
+def test_apply_codebook_compiled_equals_apply_codebook(processed_data_path):
+    dataset = CftDatasetProcessed(processed_data_path)
+    codebook = load_codebook(processed_data_path.joinpath(dataset.codebook_filename))
+    reference = apply_codebook(dataset.questionnaire.copy(), codebook)
+
+    assert_frame_equal(dataset.questionnaire_recoded, reference)
+    gender = dataset.questionnaire_recoded["gender"]
+    assert_frame_equal(gender.value_counts().to_frame(), reference["gender"].value_counts().to_frame())
+
+
+def test_apply_codebook_compiled_out_of_range():
+    codebook = pd.DataFrame(
+        {1: ["Male", "No"], 2: ["Female", "Yes"], 3: [None, "Maybe"]}, index=pd.Index(["gender", "smoking"])
+    )
+    data = pd.DataFrame({"gender": [1, 2, 3, 7, -1, np.nan], "smoking": [3, 1, 2, 0, 1.5, 2]})
+
+    data_recoded = apply_codebook_compiled(data, compile_codebook(codebook))
+    expected = pd.DataFrame(
+        {
+            "gender": ["Male", "Female", np.nan, np.nan, np.nan, np.nan],
+            "smoking": ["Maybe", "No", "Yes", np.nan, np.nan, "Yes"],
+        }
+    )
+    assert_frame_equal(data_recoded, expected)
+
+
+def test_apply_codebook_compiled_repeated_labels():
+    codebook = pd.DataFrame(
+        {1: ["Yes", "Low"], 2: ["Yes", "Low"], 3: ["No", "High"]},
+        index=pd.Index(["smoking", "income"], name="variable"),
+    )
+    data = pd.DataFrame({"smoking": [1, 2, 3, 2], "income": [3, 1, 2, np.nan]})
+
+    data_recoded = apply_codebook_compiled(data, compile_codebook(codebook))
+    assert_frame_equal(data_recoded, apply_codebook(data.copy(), codebook))
+    assert list(data_recoded["smoking"]) == ["Yes", "Yes", "No", "Yes"]
+
+
+def test_compile_codebook_negative_values():
+    codebook = pd.DataFrame({-1: ["Unknown"], 1: ["Male"]}, index=pd.Index(["gender"]))
+    with pytest.raises(ValueError, match="negative values"):
+        compile_codebook(codebook)
+
+
+@pytest.fixture()
+def index_paths(processed_data_path):
+    file_path = processed_data_path.joinpath(CftDatasetProcessed.cft_hr_features_filename)
+    sidecar_path = file_path.with_suffix(".index.json")
+    sidecar_path.unlink(missing_ok=True)
+    helper._cached_load_dataset_index.cache_clear()
+    yield file_path, processed_data_path.joinpath(CftDatasetProcessed.excluded_subjects_filename), sidecar_path
+    helper._cached_load_dataset_index.cache_clear()
+
+
+def _forbid_read_csv(monkeypatch):
+    def _read_csv(*args, **kwargs):
+        raise AssertionError("csv file must not be parsed!")
+
+    monkeypatch.setattr(pd, "read_csv", _read_csv)
+
+
+def test_dataset_index_sidecar(index_paths, monkeypatch):
+    file_path, excluded_subjects_path, sidecar_path = index_paths
+    reference = pd.read_csv(file_path, usecols=INDEX_COLS)[INDEX_COLS].drop_duplicates().reset_index(drop=True)
+
+    index, excluded_subjects = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert sidecar_path.exists()
+    assert_frame_equal(index, reference)
+    assert excluded_subjects == ["Vp07", "Vp10", "Vp22"]
+
+    # a new process (i.e., an empty in-memory cache) reuses the sidecar without parsing the csv files
+    helper._cached_load_dataset_index.cache_clear()
+    _forbid_read_csv(monkeypatch)
+    index, excluded_subjects = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert_frame_equal(index, reference)
+    assert excluded_subjects == ["Vp07", "Vp10", "Vp22"]
+
+
+def test_dataset_index_sidecar_invalidation(index_paths):
+    file_path, excluded_subjects_path, sidecar_path = index_paths
+    load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+
+    pd.DataFrame({"subject": ["Vp01"]}).to_csv(excluded_subjects_path, index=False)
+    _, excluded_subjects = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert excluded_subjects == ["Vp01"]
+
+    data = pd.read_csv(file_path)
+    data = data.loc[data["subject"].isin(["Vp01", "Vp02"])]
+    data.to_csv(file_path, index=False)
+    index, _ = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert_frame_equal(index, data[INDEX_COLS].drop_duplicates().reset_index(drop=True))
+
+    helper._cached_load_dataset_index.cache_clear()
+    index_sidecar, excluded_subjects = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert_frame_equal(index_sidecar, index)
+    assert excluded_subjects == ["Vp01"]
+
+
+def test_dataset_index_sidecar_not_writable(index_paths, monkeypatch):
+    file_path, excluded_subjects_path, sidecar_path = index_paths
+
+    def _replace(*args, **kwargs):
+        raise PermissionError("read-only file system")
+
+    monkeypatch.setattr(helper.os, "replace", _replace)
+    index, _ = load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)
+    assert not sidecar_path.exists()
+    assert list(sidecar_path.parent.glob("*.tmp")) == []
+
+    # the index is still cached in memory
+    _forbid_read_csv(monkeypatch)
+    assert_frame_equal(load_dataset_index_cached(file_path, INDEX_COLS, excluded_subjects_path)[0], index)
+
+
+def test_dataset_index_missing_excluded_subjects(index_paths):
+    _, excluded_subjects_path, _ = index_paths
+    dataset = CftDatasetProcessed(excluded_subjects_path.parent)
+    assert "Vp07" not in dataset.index["subject"].unique()
+
+    excluded_subjects_path.unlink()
+    with pytest.warns(UserWarning, match="excluded not found"):
+        dataset = CftDatasetProcessed(excluded_subjects_path.parent)
+    assert "Vp07" in dataset.index["subject"].unique()
+    assert not dataset.index.duplicated().any()
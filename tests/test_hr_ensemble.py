@@ -0,0 +1,83 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from biopsykit.protocols import MIST
+
+from cft_analysis.feature_extraction.hr_ensemble import compute_hr_ensemble, hr_ensemble_from_dict, merge_hr_ensembles
+
+PHASES = ["Pre", "MIST1", "MIST2", "MIST3", "Post"]
+STRUCTURE = {"Pre": None, "MIST": {"MIST1": None, "MIST2": None, "MIST3": None}, "Post": None}
+
+
+def _make_hr_subject_data_dict(subjects, seed=0):
+    rng = np.random.default_rng(seed)
+    hr_dict = {}
+    for subject in subjects:
+        hr_dict[subject] = {}
+        for phase in PHASES:
+            # irregularly sampled heart rate (one value per beat) with different durations per subject and phase
+            rr = rng.uniform(0.6, 1.0, size=rng.integers(150, 250))
+            index = pd.Timestamp("2021-06-01 10:00", tz="Europe/Berlin") + pd.to_timedelta(np.cumsum(rr), unit="s")
+            hr_dict[subject][phase] = pd.DataFrame(
+                {"Heart_Rate": 60 / rr + rng.normal(0, 2, len(rr))}, index=pd.DatetimeIndex(index, name="time")
+            )
+    return hr_dict
+
+
+def test_compute_hr_ensemble_equals_mist():
+    select_phases = ["MIST1", "MIST2", "MIST3"]
+    hr_dict = _make_hr_subject_data_dict(["Vp01", "Vp02", "Vp03", "Vp04"])
+
+    mist = MIST(name="CFT", structure=STRUCTURE)
+    mist.add_hr_data(hr_data=hr_dict)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        mist.compute_hr_ensemble(
+            "hr_ensemble", select_phases=True, params={"normalize_to": "Pre", "select_phases": select_phases}
+        )
+    reference, reference_metadata = hr_ensemble_from_dict(mist.hr_ensemble["hr_ensemble"])
+
+    data, metadata = compute_hr_ensemble(hr_dict, select_phases=select_phases, normalize_to="Pre")
+    assert metadata == reference_metadata
+    np.testing.assert_allclose(data, reference, rtol=1e-10)
+
+
+def test_merge_hr_ensembles_equals_all_subjects():
+    hr_dict = _make_hr_subject_data_dict(["Vp01", "Vp02", "Vp03", "Vp04", "Vp05"])
+    data, metadata = compute_hr_ensemble(hr_dict, select_phases=["MIST1", "MIST2"])
+
+    ensemble_list = [
+        compute_hr_ensemble({s: hr_dict[s] for s in subjects}, select_phases=["MIST1", "MIST2"])
+        for subjects in [["Vp01", "Vp03"], ["Vp02", "Vp04", "Vp05"]]
+    ]
+    data_merged, metadata_merged = merge_hr_ensembles(ensemble_list)
+    subject_order = [metadata_merged["subjects"].index(s) for s in metadata["subjects"]]
+    np.testing.assert_allclose(data_merged[..., subject_order], data, rtol=1e-9)
+    assert metadata_merged["phase_lengths"] == metadata["phase_lengths"]
+
+
+def test_merge_hr_ensembles_empty():
+    with pytest.raises(ValueError, match="At least one ensemble"):
+        merge_hr_ensembles([])
+
+
+def test_compute_hr_ensemble_duplicate_timestamps():
+    hr_dict = _make_hr_subject_data_dict(["Vp01", "Vp02"])
+    hr_pre = hr_dict["Vp01"]["Pre"]
+    hr_dict["Vp01"]["Pre"] = pd.concat([hr_pre, hr_pre.iloc[[-1]]])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        data, _ = compute_hr_ensemble(hr_dict, select_phases=["MIST1"])
+    assert np.all(np.isfinite(data))
+
+
+@pytest.mark.parametrize("n_samples", [0, 1])
+def test_compute_hr_ensemble_too_few_samples(n_samples):
+    hr_dict = _make_hr_subject_data_dict(["Vp01", "Vp02"])
+    hr_dict["Vp02"]["MIST1"] = hr_dict["Vp02"]["MIST1"].iloc[:n_samples]
+
+    with pytest.raises(ValueError, match="'Vp02/MIST1' must contain at least two samples"):
+        compute_hr_ensemble(hr_dict, select_phases=["MIST1"])
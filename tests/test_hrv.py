@@ -0,0 +1,129 @@
+import neurokit2 as nk
+import numpy as np
+import pandas as pd
+import pytest
+from biopsykit.utils.array_handling import sliding_window
+from pandas.testing import assert_frame_equal, assert_index_equal
+from scipy.signal import periodogram
+
+from cft_analysis.feature_extraction.hrv import HRV_FREQUENCY_BANDS, hrv_continuous
+
+
+def _hrv_continuous_reference(rpeaks: pd.DataFrame, sampling_rate: float) -> pd.DataFrame:
+    """Reference implementation: ``neurokit2.hrv_time`` on each sliding window of 10 R peaks (overlap: 9)."""
+    index = pd.to_datetime(sliding_window(pd.to_numeric(rpeaks.index), window_samples=10, overlap_samples=9)[:, 0])
+    windows = sliding_window(rpeaks[["R_Peak_Idx"]], window_samples=10, overlap_samples=9)
+    windows = pd.DataFrame(windows, index=index).dropna()
+    return windows.apply(lambda row: nk.hrv_time(row, sampling_rate=int(sampling_rate)).squeeze(), axis=1)
+
+
+def test_hrv_time_equals_reference(rpeaks):
+    rpeaks = rpeaks.iloc[:60]
+    reference = _hrv_continuous_reference(rpeaks, 256.0)
+    data = hrv_continuous(rpeaks, sampling_rate=256.0)
+
+    # the reference computes the window index via float arrays, which loses sub-microsecond precision
+    offset = (data.index - reference.index).total_seconds()
+    np.testing.assert_allclose(offset, 0, atol=1e-6)
+    assert_frame_equal(data.reset_index(drop=True), reference.reset_index(drop=True))
+
+
+def test_hrv_frequency_equals_periodogram(rpeaks):
+    window_sec = 60.0
+    data = hrv_continuous(rpeaks, hrv_types="hrv_frequency", window_sec=window_sec, step_sec=30.0)
+    rpeak_times = rpeaks["R_Peak_Idx"].to_numpy() / 256.0
+    rr_times = rpeak_times[1:]
+    rr_intervals = np.diff(rpeak_times) * 1000
+    n_samples = int(window_sec * 4)
+
+    assert len(data) > 0
+    for i, t_start in enumerate(rpeak_times[0] + np.arange(len(data)) * 30.0):
+        # only RR intervals between R peaks within the window are used
+        mask_window = (rr_times - rr_intervals / 1000 >= t_start) & (rr_times <= t_start + window_sec)
+        segment = np.interp(
+            t_start + np.arange(n_samples) / n_samples * window_sec, rr_times[mask_window], rr_intervals[mask_window]
+        )
+        freqs, psd = periodogram(
+            segment, fs=n_samples / window_sec, window=np.hanning(n_samples), detrend="constant", scaling="density"
+        )
+        for band, (f_low, f_high) in HRV_FREQUENCY_BANDS.items():
+            mask = (freqs >= f_low) & (freqs < f_high)
+            expected = np.sum(psd[mask]) / window_sec if window_sec >= 1 / f_low else np.nan
+            np.testing.assert_allclose(data[f"HRV_{band}"].iloc[i], expected, rtol=1e-10)
+    assert data["HRV_VLF"].isna().all()
+    assert data["HRV_LF"].notna().all()
+
+
+def test_hrv_frequency_short_windows(rpeaks):
+    # default windows of 10 R peaks (about 8 s) can neither resolve VLF nor LF power
+    data = hrv_continuous(rpeaks, hrv_types="hrv_frequency")
+    assert len(data) > 0
+    assert data["HRV_VLF"].isna().all()
+    assert data["HRV_LF"].isna().all()
+    assert data["HRV_HF"].notna().all()
+
+    data = hrv_continuous(rpeaks, hrv_types="hrv_frequency", window_sec=20.0)
+    assert data["HRV_LF"].isna().all()
+
+
+@pytest.mark.parametrize("window_sec", [None, 40.0])
+def test_hrv_frequency_no_leakage_between_windows(rpeaks, window_sec):
+    kwargs = {"hrv_types": "hrv_frequency", "window_beats": 50, "overlap_beats": 40, "window_sec": window_sec}
+    # moving R peak 99 changes the RR interval preceding the R peak 100
+    rpeaks_modified = rpeaks.copy()
+    rpeaks_modified.iloc[99, rpeaks.columns.get_loc("R_Peak_Idx")] -= 5
+
+    data = hrv_continuous(rpeaks, **kwargs)
+    data_modified = hrv_continuous(rpeaks_modified, **kwargs)
+    if window_sec is None:
+        # windows starting at R peak 100 or later
+        mask = np.arange(len(data)) * 10 >= 100
+    else:
+        # windows starting after R peak 99
+        t_start = (data.index - data.index[0]).total_seconds()
+        mask = t_start > (rpeaks["R_Peak_Idx"].iloc[99] - rpeaks["R_Peak_Idx"].iloc[0]) / 256.0
+    assert mask.sum() > 0
+    assert_frame_equal(data_modified.loc[mask], data.loc[mask])
+    assert not np.allclose(data_modified.loc[~mask, "HRV_HF"], data.loc[~mask, "HRV_HF"])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"window_beats": 10, "overlap_beats": 10},
+        {"window_beats": 10, "overlap_beats": 12},
+        {"window_beats": 10, "overlap_beats": -1},
+        {"window_beats": 0, "overlap_beats": 0},
+        {"window_sec": 30.0, "step_sec": 0},
+        {"window_sec": 30.0, "step_sec": -1.0},
+        {"window_sec": 0.0},
+    ],
+)
+def test_invalid_window_parameters(rpeaks, kwargs):
+    with pytest.raises(ValueError, match="must be"):
+        hrv_continuous(rpeaks, **kwargs)
+
+
+def test_time_based_window_index(make_rpeaks):
+    rpeaks_datetime = make_rpeaks(200, datetime_index=True)
+    rpeaks_numeric = make_rpeaks(200, datetime_index=False)
+
+    data_datetime = hrv_continuous(rpeaks_datetime, window_sec=30.0, step_sec=5.0)
+    data_numeric = hrv_continuous(rpeaks_numeric, window_sec=30.0, step_sec=5.0)
+
+    # both index types denote absolute time, starting at the first R peak
+    assert data_numeric.index[0] == rpeaks_numeric.index[0]
+    offsets_datetime = (data_datetime.index - data_datetime.index[0]).total_seconds()
+    offsets_numeric = data_numeric.index - rpeaks_numeric.index[0]
+    np.testing.assert_allclose(offsets_datetime, offsets_numeric)
+    assert_frame_equal(data_datetime.reset_index(drop=True), data_numeric.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("n_beats", [0, 5])
+@pytest.mark.parametrize("window_sec", [None, 30.0])
+def test_too_few_rpeaks(make_rpeaks, rpeaks, n_beats, window_sec):
+    columns = hrv_continuous(rpeaks, hrv_types=["hrv_time", "hrv_frequency"], window_sec=window_sec).columns
+
+    data = hrv_continuous(make_rpeaks(n_beats), hrv_types=["hrv_time", "hrv_frequency"], window_sec=window_sec)
+    assert data.empty
+    assert_index_equal(data.columns, columns)
@@ -0,0 +1,125 @@
+import struct
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from biopsykit.io.nilspod import load_csv_nilspod, load_dataset_nilspod
+from nilspodlib.exceptions import VersionError
+from nilspodlib.legacy import LegacyWarning
+from pandas.testing import assert_frame_equal
+
+from cft_analysis.datasets.helper import load_nilspod_bin_fast, load_nilspod_csv_fast
+
+# sample size (in bytes) of the sensors enabled by the sensor flags in the order of the packets
+_SENSOR_BYTES = {0x02: 6, 0x01: 6, 0x04: 6, 0x08: 2, 0x10: 6, 0x20: 4, 0x40: 4, 0x80: 2}
+
+
+def _write_nilspod_bin(
+    file_path, n_samples=3000, version=(0, 19, 2), sensor_flags=0x23, counter=None, n_samples_header=None, seed=0
+):
+    """Write a minimal NilsPod binary file with random sensor data (sensor flags 0x23: acc, gyro, ecg)."""
+    sample_size = sum(n_bytes for flag, n_bytes in _SENSOR_BYTES.items() if sensor_flags & flag) + 4
+    header = np.zeros(51, dtype=np.uint8)
+    header[0] = sample_size
+    header[1] = sensor_flags
+    header[3] = 4  # sampling rate: 256 Hz
+    header[4] = 0x10
+    header[7:9] = 16
+    header[14:18] = np.frombuffer(struct.pack("<I", 1609495200), np.uint8)  # start: 2021-01-01 10:00 UTC
+    header[18:22] = np.frombuffer(struct.pack("<I", 1609495200 + n_samples // 256), np.uint8)
+    header[22:26] = np.frombuffer(
+        struct.pack("<I", n_samples if n_samples_header is None else n_samples_header), np.uint8
+    )
+    header[-3:] = version
+
+    rng = np.random.default_rng(seed)
+    packets = rng.integers(0, 256, size=(n_samples, sample_size), dtype=np.uint8)
+    if counter is None:
+        counter = np.arange(n_samples) + 123456
+    packets[:, -4:] = np.asarray(counter, dtype="<u4").view(np.uint8).reshape(-1, 4)
+    with open(file_path, "wb") as fp:
+        fp.write(np.concatenate([[52], header]).astype(np.uint8).tobytes())
+        fp.write(packets.tobytes())
+    return file_path
+
+
+def _load_reference(file_path, datastreams):
+    return load_dataset_nilspod(
+        file_path=file_path, handle_counter_inconsistency="ignore", legacy_support="resolve", datastreams=datastreams
+    )
+
+
+def _counter(kind, n_samples=3000):
+    counter = np.arange(n_samples) + 123456
+    if kind == "corrupted_last":
+        counter[-1] = counter[-2]
+    elif kind == "corrupted_mid":
+        counter[1000] = counter[999]
+    elif kind == "gap":
+        counter[1500:] += 10
+    return counter
+
+
+@pytest.mark.parametrize("version", [(0, 19, 2), (0, 18, 0), (0, 15, 0)])
+@pytest.mark.parametrize("counter", ["valid", "corrupted_last", "corrupted_mid", "gap"])
+def test_load_nilspod_bin_fast_equals_nilspodlib(tmp_path, version, counter):
+    file_path = _write_nilspod_bin(tmp_path.joinpath("test.bin"), version=version, counter=_counter(counter))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        reference, fs_reference = _load_reference(file_path, ["ecg"])
+        data, fs = load_nilspod_bin_fast(file_path, "ecg")
+    assert fs == fs_reference
+    assert_frame_equal(data, reference)
+
+
+def test_load_nilspod_bin_fast_fallback(tmp_path):
+    # datastreams that require calibration are loaded with nilspodlib
+    file_path = _write_nilspod_bin(tmp_path.joinpath("test.bin"))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        reference, _ = _load_reference(file_path, ["ecg", "acc"])
+        data, _ = load_nilspod_bin_fast(file_path, ["ecg", "acc"])
+    assert_frame_equal(data, reference)
+
+
+def test_load_nilspod_bin_fast_sample_mismatch(tmp_path):
+    file_path = _write_nilspod_bin(tmp_path.joinpath("test.bin"), n_samples_header=2900)
+    with pytest.warns(LegacyWarning, match="does not match the number indicated by the header"):
+        data, _ = load_nilspod_bin_fast(file_path, "ecg")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        reference, _ = _load_reference(file_path, ["ecg"])
+    assert_frame_equal(data, reference)
+
+
+def test_load_nilspod_bin_fast_unsupported_version(tmp_path):
+    file_path = _write_nilspod_bin(tmp_path.joinpath("test.bin"), version=(0, 9, 0))
+    with pytest.raises(VersionError):
+        _load_reference(file_path, ["ecg"])
+    with pytest.raises(VersionError):
+        load_nilspod_bin_fast(file_path, "ecg")
+
+
+@pytest.mark.parametrize("file_name", ["NilsPodX-A1B2_20210101_100000.csv", "ecg_data.csv"])
+def test_load_nilspod_csv_fast_equals_biopsykit(tmp_path, file_name):
+    rng = np.random.default_rng(0)
+    n_samples = 2000
+    data = pd.DataFrame(
+        {
+            "timestamp": np.arange(n_samples) + 42,
+            "acc_x": rng.normal(size=n_samples),
+            "ecg": rng.normal(size=n_samples),
+            "ecg_2": rng.normal(size=n_samples),
+        }
+    )
+    file_path = tmp_path.joinpath(file_name)
+    with open(file_path, "w", encoding="utf-8") as fp:
+        fp.write("sampling_rate,256.0\n")
+        data.to_csv(fp, index=False)
+
+    reference, fs_reference = load_csv_nilspod(file_path, datastreams=["ecg"])
+    data, fs = load_nilspod_csv_fast(file_path, "ecg")
+    assert fs == fs_reference
+    assert_frame_equal(data, reference)
@@ -0,0 +1,240 @@
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from biopsykit.io import load_long_format_csv
+from pandas.testing import assert_frame_equal
+
+from cft_analysis import cli, pipeline
+from cft_analysis.datasets import CftDatasetProcessed
+from cft_analysis.feature_extraction.hr_ensemble import write_hr_ensemble
+from cft_analysis.pipeline import merge_features, parse_shard, shard_subjects
+
+
+def _load_processed_results(processed_data_path):
+    """Load the (unsharded) processed ECG results shipped with the experiment."""
+    features = load_long_format_csv(processed_data_path.joinpath("ecg/cft_hr_features_merged.csv"))
+    cft_params = pd.read_csv(processed_data_path.joinpath("ecg/cft_parameter.csv"), index_col=["subject", "phase"])
+    hr_ensemble = np.load(processed_data_path.joinpath("ecg/cft_hr_ensemble.npy"))
+    with processed_data_path.joinpath("ecg/cft_hr_ensemble.json").open(encoding="utf-8") as fp:
+        hr_ensemble_metadata = json.load(fp)
+    return features, cft_params, (hr_ensemble, hr_ensemble_metadata)
+
+
+def _select_subjects(results, subjects):
+    """Select the processed ECG results of some subjects, as returned by ``_compute_features_subjects``."""
+    features, cft_params, (hr_ensemble, hr_ensemble_metadata) = results
+    subject_idx = [hr_ensemble_metadata["subjects"].index(s) for s in subjects if s in hr_ensemble_metadata["subjects"]]
+    metadata = dict(hr_ensemble_metadata, subjects=[hr_ensemble_metadata["subjects"][i] for i in subject_idx])
+    return (
+        features.loc[features.index.get_level_values("subject").isin(subjects)],
+        cft_params.loc[cft_params.index.get_level_values("subject").isin(subjects)],
+        (hr_ensemble[..., subject_idx], metadata),
+    )
+
+
+def _write_shard_results(processed_data_path, output_path, n_shards):
+    """Split the processed ECG results into shards, as written by ``compute_features``."""
+    results = _load_processed_results(processed_data_path)
+    features, cft_params, (hr_ensemble, _) = results
+
+    all_subjects = sorted(features.index.get_level_values("subject").unique())
+    for shard_index in range(n_shards):
+        subjects = shard_subjects(all_subjects, shard_index, n_shards)
+        shard_path = output_path.joinpath("ecg", "shards", "shard_{}_of_{}".format(shard_index, n_shards))
+        shard_path.mkdir(parents=True)
+        if len(subjects) > 0:
+            features_shard, cft_params_shard, (hr_ensemble_shard, metadata) = _select_subjects(results, subjects)
+            features_shard.to_csv(shard_path.joinpath("cft_hr_features.csv"))
+            cft_params_shard.to_csv(shard_path.joinpath("cft_parameter.csv"))
+            write_hr_ensemble(hr_ensemble_shard, metadata, shard_path.joinpath("cft_hr_ensemble.npy"))
+        manifest = {
+            "shard_index": shard_index,
+            "n_shards": n_shards,
+            "subjects": subjects,
+            "all_subjects": all_subjects,
+        }
+        with shard_path.joinpath("manifest.json").open("w", encoding="utf-8") as fp:
+            json.dump(manifest, fp)
+    return features, cft_params, hr_ensemble
+
+
+@pytest.fixture()
+def raw_data_path(processed_data_path, tmp_path):
+    """Raw dataset with the subjects and conditions of the processed data (without ECG recordings)."""
+    raw_data_path = tmp_path.joinpath("raw")
+    condition_list = CftDatasetProcessed(processed_data_path, exclude_subjects=False).condition_list
+    raw_data_path.mkdir()
+    condition_list.to_csv(raw_data_path.joinpath("condition_list.csv"))
+    for subject in condition_list.index:
+        raw_data_path.joinpath("ecg", subject).mkdir(parents=True)
+    return raw_data_path
+
+
+@pytest.mark.parametrize(("shard", "expected"), [("0/1", (0, 1)), ("3/4", (3, 4))])
+def test_parse_shard(shard, expected):
+    assert parse_shard(shard) == expected
+
+
+@pytest.mark.parametrize("shard", ["4/4", "-1/4", "0/0", "1", "a/b"])
+def test_parse_shard_invalid(shard):
+    with pytest.raises(ValueError, match="Invalid shard"):
+        parse_shard(shard)
+
+
+@pytest.mark.parametrize("n_shards", [1, 3, 7, 40])
+def test_shard_subjects_partition(n_shards):
+    subjects = ["Vp{:02d}".format(i) for i in range(30, 0, -1)]
+    shards = [shard_subjects(subjects, i, n_shards) for i in range(n_shards)]
+
+    assert sorted(s for shard in shards for s in shard) == sorted(subjects)
+    assert max(len(shard) for shard in shards) - min(len(shard) for shard in shards) <= 1
+    # the partitioning does not depend on the order of the subjects
+    assert shards == [shard_subjects(sorted(subjects), i, n_shards) for i in range(n_shards)]
+
+
+@pytest.mark.parametrize("n_shards", [1, 4, 40])
+def test_merge_features_equals_unsharded(processed_data_path, tmp_path, n_shards):
+    output_path = tmp_path.joinpath("output")
+    features, cft_params, hr_ensemble = _write_shard_results(processed_data_path, output_path, n_shards)
+
+    export_paths = merge_features(output_path)
+    assert_frame_equal(load_long_format_csv(export_paths["features"]), features.sort_index())
+    assert_frame_equal(
+        pd.read_csv(export_paths["cft_parameter"], index_col=["subject", "phase"]), cft_params.sort_index()
+    )
+    np.testing.assert_array_equal(np.load(export_paths["hr_ensemble"]), hr_ensemble)
+
+
+def test_merge_features_missing_shard(processed_data_path, tmp_path):
+    output_path = tmp_path.joinpath("output")
+    _write_shard_results(processed_data_path, output_path, 4)
+    output_path.joinpath("ecg/shards/shard_2_of_4/manifest.json").unlink()
+
+    with pytest.raises(ValueError, match=r"Missing results of shard\(s\) \[2\]"):
+        merge_features(output_path)
+
+
+def test_merge_features_no_subjects(tmp_path):
+    for shard_index in range(2):
+        shard_path = tmp_path.joinpath("ecg", "shards", "shard_{}_of_2".format(shard_index))
+        shard_path.mkdir(parents=True)
+        manifest = {"shard_index": shard_index, "n_shards": 2, "subjects": [], "all_subjects": []}
+        with shard_path.joinpath("manifest.json").open("w", encoding="utf-8") as fp:
+            json.dump(manifest, fp)
+
+    with pytest.raises(ValueError, match="None of the shards contains any subjects"):
+        merge_features(tmp_path)
+
+
+def test_import_does_not_load_pipeline():
+    code = "import sys, cft_analysis; assert 'cft_analysis.pipeline' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize("n_shards", [1, 3])
+def test_compute_features_shards(processed_data_path, raw_data_path, tmp_path, monkeypatch, n_shards):
+    results = _load_processed_results(processed_data_path)
+    computed_subjects = []
+
+    def _compute_features_subjects(dataset, subjects):
+        assert list(dataset.index["subject"].unique()) == list(subjects)
+        computed_subjects.append(list(subjects))
+        return _select_subjects(results, subjects)
+
+    monkeypatch.setattr(pipeline, "_compute_features_subjects", _compute_features_subjects)
+    output_path = tmp_path.joinpath("output")
+    all_subjects = sorted(pd.read_csv(raw_data_path.joinpath("condition_list.csv"))["subject"])
+
+    for shard_index in range(n_shards):
+        shard_path = pipeline.compute_features(raw_data_path, output_path, shard_index, n_shards)
+        assert shard_path == output_path.joinpath("ecg", "shards", "shard_{}_of_{}".format(shard_index, n_shards))
+        with shard_path.joinpath("manifest.json").open(encoding="utf-8") as fp:
+            manifest = json.load(fp)
+        subjects = shard_subjects(all_subjects, shard_index, n_shards)
+        assert manifest == {
+            "shard_index": shard_index,
+            "n_shards": n_shards,
+            "subjects": subjects,
+            "all_subjects": all_subjects,
+        }
+        with shard_path.joinpath("cft_hr_ensemble.json").open(encoding="utf-8") as fp:
+            assert json.load(fp)["subjects"] == [s for s in subjects if s in results[2][1]["subjects"]]
+    assert computed_subjects == [shard_subjects(all_subjects, i, n_shards) for i in range(n_shards)]
+
+    features, cft_params, (hr_ensemble, _) = results
+    export_paths = merge_features(output_path)
+    assert_frame_equal(load_long_format_csv(export_paths["features"]), features.sort_index())
+    np.testing.assert_array_equal(np.load(export_paths["hr_ensemble"]), hr_ensemble)
+
+
+def test_process_ecg_skips_processed_subjects(raw_data_path):
+    subjects = shard_subjects(pd.read_csv(raw_data_path.joinpath("condition_list.csv"))["subject"], 1, 4)
+    for subject in subjects:
+        raw_data_path.joinpath("ecg", subject, "processed").mkdir()
+        raw_data_path.joinpath("ecg", subject, "processed", "hr_result_{}.xlsx".format(subject)).touch()
+
+    # all subjects of the shard are already processed => nothing to do (and no raw ECG data required)
+    assert pipeline.process_ecg(raw_data_path, 1, 4) == []
+
+
+def test_cli_merge(processed_data_path, tmp_path, capsys):
+    output_path = tmp_path.joinpath("output")
+    features, _, hr_ensemble = _write_shard_results(processed_data_path, output_path, 4)
+
+    cli.main(["merge", str(output_path)])
+    out = capsys.readouterr().out
+    assert "Exported '{}'.".format(output_path.joinpath("ecg", "cft_hr_features_merged.csv")) in out
+    assert_frame_equal(load_long_format_csv(output_path.joinpath("ecg/cft_hr_features_merged.csv")), features)
+    np.testing.assert_array_equal(np.load(output_path.joinpath("ecg/cft_hr_ensemble.npy")), hr_ensemble)
+
+
+def test_cli_merge_error(processed_data_path, tmp_path, capsys):
+    output_path = tmp_path.joinpath("output")
+    _write_shard_results(processed_data_path, output_path, 4)
+    output_path.joinpath("ecg/shards/shard_1_of_4/manifest.json").unlink()
+
+    with pytest.raises(SystemExit) as e:
+        cli.main(["merge", str(output_path)])
+    assert e.value.code == 1
+    assert "Merging failed: Missing results of shard(s) [1]" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit) as e:
+        cli.main(["merge", str(tmp_path.joinpath("empty"))])
+    assert e.value.code == 1
+    assert "Merging failed: No shard results found" in capsys.readouterr().err
+
+
+def test_cli_process_ecg(raw_data_path, capsys):
+    for subject in shard_subjects(pd.read_csv(raw_data_path.joinpath("condition_list.csv"))["subject"], 0, 40):
+        raw_data_path.joinpath("ecg", subject, "processed").mkdir()
+        raw_data_path.joinpath("ecg", subject, "processed", "hr_result_{}.xlsx".format(subject)).touch()
+
+    cli.main(["process-ecg", str(raw_data_path), "--shard", "0/40"])
+    assert "Processed ECG data of 0 subject(s) in shard 0/40." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["process-ecg", "data", "--shard", "4/4"],
+        ["compute-features", "data", "output", "--shard", "a/b"],
+        ["compute-features", "data"],
+        ["unknown"],
+    ],
+)
+def test_cli_invalid_arguments(argv, capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main(argv)
+    assert e.value.code == 2
+    assert "usage: cft-analysis" in capsys.readouterr().err
+
+
+def test_cli_no_command(capsys):
+    with pytest.raises(SystemExit) as e:
+        cli.main([])
+    assert e.value.code == 1
+    assert "usage: cft-analysis" in capsys.readouterr().out
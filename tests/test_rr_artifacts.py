@@ -0,0 +1,149 @@
+import sys
+from types import SimpleNamespace
+
+import neurokit2 as nk  # noqa: F401 (import to register the neurokit2 submodules)
+import numpy as np
+import pandas as pd
+import pytest
+
+from cft_analysis.feature_extraction.hrv import hrv_continuous_dict, hrv_continuous_dict_corrected
+from cft_analysis.feature_extraction.rr_artifacts import (
+    RR_ARTIFACT_TYPES,
+    correct_rpeak_artifacts,
+    detect_rpeak_artifacts,
+)
+
+nk_fixpeaks = sys.modules["neurokit2.signal.signal_fixpeaks"]
+
+SAMPLING_RATE = 256.0
+
+
+def _inject_artifacts(rpeaks: pd.DataFrame, artifacts) -> pd.DataFrame:
+    """Inject artifacts (list of (beat, artifact type)) into R-peak data, starting with the last beat."""
+    peaks = list(rpeaks["R_Peak_Idx"])
+    for beat, artifact in sorted(artifacts, reverse=True):
+        if artifact == "missed":
+            del peaks[beat]
+        elif artifact == "extra":
+            peaks.insert(beat, (peaks[beat - 1] + peaks[beat]) / 2 - 20)
+        elif artifact == "ectopic":
+            peaks[beat] -= 60
+    peaks = np.array(peaks)
+    index = pd.DatetimeIndex(
+        rpeaks.index[0] + pd.to_timedelta((peaks - peaks[0]) / SAMPLING_RATE, unit="s"), name=rpeaks.index.name
+    )
+    return pd.DataFrame(
+        {
+            "R_Peak_Quality": 1.0,
+            "R_Peak_Idx": peaks,
+            "RR_Interval": np.ediff1d(peaks, to_end=0) / SAMPLING_RATE,
+            "R_Peak_Outlier": 0,
+        },
+        index=index,
+    )
+
+
+@pytest.fixture()
+def rpeak_dict(make_rpeaks):
+    artifacts = [(40, "missed"), (90, "extra"), (140, "ectopic"), (190, "missed"), (240, "ectopic")]
+    return {
+        "Vp01": {"Pre": make_rpeaks(300, seed=0), "CFT": _inject_artifacts(make_rpeaks(300, seed=1), artifacts)},
+        "Vp02": {"Pre": _inject_artifacts(make_rpeaks(250, seed=2), artifacts[1:4]), "CFT": make_rpeaks(3, seed=3)},
+    }
+
+
+def test_detect_artifacts_equals_neurokit(rpeak_dict):
+    artifacts = detect_rpeak_artifacts(rpeak_dict, sampling_rate=SAMPLING_RATE)
+    for subject, phase_dict in rpeak_dict.items():
+        for phase, rpeaks in phase_dict.items():
+            if len(rpeaks) < 4:
+                assert artifacts[subject][phase].isna().all()
+                continue
+            reference = nk_fixpeaks._find_artifacts(rpeaks["R_Peak_Idx"].to_numpy(), sampling_rate=SAMPLING_RATE)[0]
+            labels = artifacts[subject][phase].to_numpy()
+            for artifact in RR_ARTIFACT_TYPES:
+                np.testing.assert_array_equal(np.where(labels == artifact)[0], reference[artifact])
+
+
+@pytest.mark.parametrize("artifact", ["missed", "extra", "ectopic"])
+def test_correct_isolated_artifact_equals_neurokit(make_rpeaks, artifact):
+    rpeaks = _inject_artifacts(make_rpeaks(300), [(150, artifact)])
+    peaks = rpeaks["R_Peak_Idx"].to_numpy()
+
+    rpeaks_corrected, report = correct_rpeak_artifacts(rpeaks, sampling_rate=SAMPLING_RATE, iterative=True)
+    _, reference = nk_fixpeaks._signal_fixpeaks_kubios(peaks, sampling_rate=SAMPLING_RATE, iterative=True)
+
+    assert report[artifact] >= 1
+    assert len(rpeaks_corrected) == len(reference)
+    # neurokit casts the corrected R-peak positions to int
+    np.testing.assert_allclose(rpeaks_corrected["R_Peak_Idx"], reference, atol=1)
+    assert rpeaks_corrected["R_Peak_Outlier"].sum() >= 1
+
+
+@pytest.mark.parametrize(
+    "artifacts",
+    [[(150, "ectopic")], [(60, "ectopic"), (150, "missed"), (240, "ectopic")], [(100, "missed"), (200, "missed")]],
+)
+def test_report_counts_corrected_beats(make_rpeaks, artifacts):
+    rpeaks = _inject_artifacts(make_rpeaks(300), artifacts)
+
+    rpeaks_corrected, report = correct_rpeak_artifacts(rpeaks, sampling_rate=SAMPLING_RATE)
+    n_outlier = rpeaks_corrected["R_Peak_Outlier"].sum()
+    assert report["extra"] == 0
+    assert report[RR_ARTIFACT_TYPES].sum() == n_outlier
+    assert report["fraction_corrected"] * report["n_beats"] == pytest.approx(n_outlier)
+
+
+def test_report_counts_removed_beats(rpeak_dict):
+    rpeaks_corrected, report = correct_rpeak_artifacts(rpeak_dict, sampling_rate=SAMPLING_RATE)
+    for subject, phase_dict in rpeaks_corrected.items():
+        for phase, rpeaks in phase_dict.items():
+            report_phase = report.loc[(subject, phase)]
+            # removed extra beats are not part of the corrected data anymore
+            n_corrected = rpeaks["R_Peak_Outlier"].sum() + report_phase["extra"]
+            n_beats = len(rpeak_dict[subject][phase])
+            assert report_phase["n_beats"] == n_beats
+            assert len(rpeaks) == n_beats - report_phase["extra"] + rpeaks["R_Peak_Quality"].isna().sum()
+            assert report_phase[RR_ARTIFACT_TYPES].sum() == n_corrected
+            assert report_phase["fraction_corrected"] * n_beats == pytest.approx(n_corrected)
+    assert report.loc[("Vp01", "CFT"), "extra"] >= 1
+
+
+def test_correct_artifacts_batch_equals_single(rpeak_dict):
+    rpeaks_corrected, report = correct_rpeak_artifacts(rpeak_dict, sampling_rate=SAMPLING_RATE)
+    for subject, phase_dict in rpeak_dict.items():
+        for phase, rpeaks in phase_dict.items():
+            rpeaks_single, report_single = correct_rpeak_artifacts(rpeaks, sampling_rate=SAMPLING_RATE)
+            pd.testing.assert_frame_equal(rpeaks_corrected[subject][phase], rpeaks_single)
+            pd.testing.assert_series_equal(report.loc[(subject, phase)], report_single, check_names=False)
+
+
+def test_report_index_names(rpeak_dict):
+    _, report = correct_rpeak_artifacts(rpeak_dict, sampling_rate=SAMPLING_RATE)
+    assert list(report.index.names) == [None, None]
+    assert list(report.columns) == RR_ARTIFACT_TYPES + ["n_beats", "fraction_corrected"]
+
+    _, report = correct_rpeak_artifacts(rpeak_dict, sampling_rate=SAMPLING_RATE, index_names=["subject", "phase"])
+    assert list(report.index.names) == ["subject", "phase"]
+
+    _, report = correct_rpeak_artifacts(rpeak_dict["Vp01"], sampling_rate=SAMPLING_RATE, index_names=["phase"])
+    assert list(report.index) == ["Pre", "CFT"]
+    assert report.index.name == "phase"
+
+    with pytest.raises(ValueError, match="index_names"):
+        correct_rpeak_artifacts(rpeak_dict["Vp01"], sampling_rate=SAMPLING_RATE, index_names=["subject", "phase"])
+
+
+def test_hrv_continuous_dict_return_types(rpeak_dict):
+    ecg_processor = SimpleNamespace(rpeaks=rpeak_dict["Vp01"], sampling_rate=SAMPLING_RATE)
+
+    dict_hrv = hrv_continuous_dict(ecg_processor, correct_artifacts=True)
+    assert isinstance(dict_hrv, dict)
+    assert list(dict_hrv) == ["Pre", "CFT"]
+
+    dict_hrv_corrected, report = hrv_continuous_dict_corrected(ecg_processor)
+    assert list(dict_hrv_corrected) == ["Pre", "CFT"]
+    for phase, hrv in dict_hrv.items():
+        pd.testing.assert_frame_equal(hrv, dict_hrv_corrected[phase])
+    assert report.index.name == "phase"
+    assert report.loc["CFT", RR_ARTIFACT_TYPES].sum() > report.loc["Pre", RR_ARTIFACT_TYPES].sum()
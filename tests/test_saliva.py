@@ -0,0 +1,128 @@
+import biopsykit as bp
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from cft_analysis.datasets import CftDatasetProcessed
+from cft_analysis.feature_extraction.saliva import saliva_features, saliva_window_features
+
+FEATURE_SAMPLE_TIMES = [-30, -1, 30, 40, 50, 60, 70]
+
+
+def test_compute_saliva_features_reproduces_cortisol_features(processed_data_path):
+    dataset = CftDatasetProcessed(processed_data_path)
+    reference = dataset.cortisol_features["cortisol"].unstack("saliva_feature")
+
+    features = dataset.compute_saliva_features()["cortisol"].unstack(["window", "saliva_feature"])
+    features = pd.DataFrame(
+        {
+            "auc_g": features[("S1S6", "auc_g")],
+            "auc_i": features[("S1S6", "auc_i")],
+            "auc_i_post": features[("S2S6", "auc_i")],
+            "max_inc": features[("S1S6", "max_inc")],
+            "max_inc_percent": features[("S1S6", "max_inc_percent")],
+            "slopeS1S4": features[("S1S4", "slope")],
+        }
+    )
+    features.columns.name = "saliva_feature"
+    assert_frame_equal(features, reference[features.columns], check_exact=False, rtol=1e-9)
+
+
+def test_saliva_features_reproduces_cortisol_features(processed_data_path):
+    dataset = CftDatasetProcessed(processed_data_path)
+
+    features = saliva_features(dataset.cortisol, FEATURE_SAMPLE_TIMES)
+    assert_frame_equal(features, dataset.cortisol_features.sort_index(), check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("remove_s0", [True, False])
+def test_saliva_window_features_equals_biopsykit(processed_data_path, remove_s0):
+    data = CftDatasetProcessed(processed_data_path).cortisol
+    data = data.loc[data.groupby("subject")["cortisol"].transform(lambda x: x.notna().all())]
+    sample_times = FEATURE_SAMPLE_TIMES
+    if remove_s0:
+        data = data.drop("S0", level="sample")
+        sample_times = sample_times[1:]
+    samples = list(data.index.get_level_values("sample").unique())
+
+    features = saliva_window_features(data, sample_times, windows={"total": (samples[0], samples[-1])})
+    features = features["cortisol"].xs("total", level="window").unstack("saliva_feature")
+
+    auc = bp.saliva.auc(data, remove_s0=False, sample_times=sample_times)
+    max_inc = bp.saliva.max_increase(data, remove_s0=False)
+    max_inc_percent = bp.saliva.max_increase(data, remove_s0=False, percent=True)
+    slope = bp.saliva.slope(data, sample_labels=[samples[0], samples[-1]], sample_times=sample_times)
+    np.testing.assert_allclose(features["auc_g"], auc["cortisol_auc_g"], rtol=1e-9)
+    np.testing.assert_allclose(features["auc_i"], auc["cortisol_auc_i"], rtol=1e-9)
+    np.testing.assert_allclose(features["max_inc"], max_inc["cortisol_max_inc"], rtol=1e-9)
+    np.testing.assert_allclose(features["max_inc_percent"], max_inc_percent["cortisol_max_inc_percent"], rtol=1e-9)
+    np.testing.assert_allclose(features["slope"], slope.iloc[:, 0], rtol=1e-9)
+
+
+SAMPLE_TIMES = [0, 10, 20, 30, 40]
+
+
+def _saliva_data(values) -> pd.DataFrame:
+    """Create saliva data of one subject per row of ``values`` (samples S0 to S4)."""
+    index = pd.MultiIndex.from_product(
+        [["Vp{:02d}".format(i + 1) for i in range(len(values))], ["S{}".format(i) for i in range(5)]],
+        names=["subject", "sample"],
+    )
+    return pd.DataFrame({"cortisol": np.ravel(values).astype(float)}, index=index)
+
+
+def _window_features(data: pd.DataFrame, windows) -> pd.DataFrame:
+    features = saliva_window_features(data, SAMPLE_TIMES, windows=windows)
+    return features["cortisol"].unstack(["window", "saliva_feature"])
+
+
+def test_saliva_window_features_interior_missing_sample():
+    data = _saliva_data([[1, 2, np.nan, 4, 5], [1, 2, 3, 4, 5]])
+    features = _window_features(data, {"total": ("S0", "S4"), "end": ("S1", "S3")})
+
+    # the missing sample is linearly interpolated, which is equal to the trapezoid over the available samples
+    for subject in ["Vp01", "Vp02"]:
+        assert features.loc[subject, ("total", "auc_g")] == pytest.approx(np.trapz([1, 2, 4, 5], [0, 10, 30, 40]))
+        assert features.loc[subject, ("total", "auc_i")] == pytest.approx(np.trapz([0, 1, 3, 4], [0, 10, 30, 40]))
+        assert features.loc[subject, ("total", "max_inc")] == pytest.approx(4)
+        assert features.loc[subject, ("total", "slope")] == pytest.approx(0.1)
+        assert features.loc[subject, ("end", "auc_g")] == pytest.approx(np.trapz([2, 4], [10, 30]))
+
+
+@pytest.mark.parametrize("sample", ["S0", "S2", "S4"])
+def test_saliva_window_features_absent_sample_row(sample):
+    values = [[1, 2, 7, 4, 5], [2, 3, 4, 5, 6]]
+    data = _saliva_data(values)
+    data_missing = data.copy()
+    data_missing.loc[("Vp01", sample)] = np.nan
+    # the sample row of the first subject is absent instead of NaN
+    data_absent = data.drop(index=("Vp01", sample))
+
+    assert_frame_equal(_window_features(data_absent, None), _window_features(data_missing, None))
+
+
+@pytest.mark.parametrize("sample", ["S1", "S3"])
+def test_saliva_window_features_missing_first_or_last_sample(sample):
+    data = _saliva_data([[1, 2, 3, 4, 5], [1, 2, 3, 4, 5]])
+    data.loc[("Vp01", sample)] = np.nan
+    features = _window_features(data, {"window": ("S1", "S3"), "total": ("S0", "S4")})
+
+    assert features.loc["Vp01", "window"].isna().all()
+    assert features.loc["Vp02", "window"].notna().all()
+    # the sample is an interior sample of the total window
+    assert features.loc["Vp01", "total"].notna().all()
+    np.testing.assert_allclose(features.loc["Vp01", "total"], features.loc["Vp02", "total"])
+
+
+def test_saliva_features_absent_sample_row(processed_data_path):
+    data = CftDatasetProcessed(processed_data_path).cortisol
+    # the first two samples (S0 and S1) of the first subject are missing
+    index_missing = data.index[:2]
+    data_missing = data.copy()
+    data_missing.loc[index_missing] = np.nan
+    data_absent = data.drop(index=index_missing)
+
+    features = saliva_features(data_absent, FEATURE_SAMPLE_TIMES)
+    assert_frame_equal(features, saliva_features(data_missing, FEATURE_SAMPLE_TIMES))
+    assert_frame_equal(features.dropna(), saliva_features(data, FEATURE_SAMPLE_TIMES).loc[features.dropna().index])